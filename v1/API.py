@@ -1,5 +1,5 @@
 #!/usr/bin/python3.7
-import datetime, pprint, json
+import datetime, pprint, json, os, sys
 from typing import List
 
 from _common.utils import asdict_without_datetostr as asdict
@@ -8,6 +8,9 @@ from _common.E22_UART import E22_UART
 
 from bsp.v1.Process import Process
 from bsp.v1.Process import GatewayResponse
+from bsp.v1.Process import CommandJob
+from bsp.v1.SampleSync import SampleSync, SyncResult
+from bsp.v1.ClockSync import ClockSync, ClockSyncResult
 
 from bsp.v1.aireador import interfaces as AireadorInterfaces, parameter_interfaces as AireadorParameterInterfaces
 from bsp.v1.aireador import metadata_interfaces as AireadorMetadataInterfaces
@@ -16,6 +19,11 @@ from bsp.v1.oxygenometro import parameter_interfaces as OxigenometroParameterInt
     interfaces as OxigenometroInterfaces, metadata_interfaces as OxigenometroMetadataInterfaces
 
 from bsp.v1._generic import parameter_interfaces as GenericParameterInterfaces, interfaces as GenericInterfaces
+from bsp.v1._generic import serializer
+from bsp.v1._generic.metrics import metrics
+
+# "pprint": legacy output, "json": one json object per line, "msgpack": binary to stdout
+OUTPUT_FORMAT = os.environ.get("BSP_OUTPUT_FORMAT", "pprint")
 
 
 def _print_response(show: bool, gateway_response: GatewayResponse):
@@ -23,9 +31,35 @@ def _print_response(show: bool, gateway_response: GatewayResponse):
         if isinstance(o, (datetime.date, datetime.datetime)):
             return str(o)
 
-    if show:
-        pprint.pprint(json.loads(json.dumps(asdict(gateway_response), default=fnc)), compact=True)
-        print()
+    if not show:
+        return
+
+    if OUTPUT_FORMAT == "json":
+        serializer.write_json(gateway_response, sys.stdout)
+        return
+
+    if OUTPUT_FORMAT == "msgpack":
+        sys.stdout.flush()
+        serializer.write_msgpack(gateway_response, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        return
+
+    pprint.pprint(json.loads(json.dumps(asdict(gateway_response), default=fnc)), compact=True)
+    print()
+
+
+def _send_job(retries: int, timeout_ms: int, show: bool, job: CommandJob) -> GatewayResponse:
+    gw_r = Process.send_command(
+        retries=retries, timeout_ms=timeout_ms, hw_id=job.hw_id,
+        address=job.address,
+        command=job.command,
+        parameter=job.parameter,
+        matadata_received_dc=job.matadata_received_dc
+    )
+
+    _print_response(show=show, gateway_response=gw_r)
+
+    return gw_r
 
 #######################################
 # Metodos para gateway
@@ -33,28 +67,115 @@ def _print_response(show: bool, gateway_response: GatewayResponse):
 
 
 def gateway_restart():
-    E22_UART.restart_lora_module()
+    Process.transport.restart_lora_module()
+    Process.invalidate_radio_state()
     print({"status": "ok"})
 
 
+def gateway_send_batch(retries: int, timeout_ms: int, show: bool,
+                       jobs: List[CommandJob], window: int = 1) -> List[GatewayResponse]:
+
+    # window > 1 sends up to window commands of a group before waiting for replies
+    gw_r_lst = Process.send_commands(retries=retries, timeout_ms=timeout_ms, jobs=jobs, window=window)
+
+    for gw_r in gw_r_lst:
+        _print_response(show=show, gateway_response=gw_r)
+
+    return gw_r_lst
+
+
+def gateway_metrics(enable: bool, dump_path: str = None) -> dict:
+    # enables or disables the stage timings, the collected histograms are returned
+    # and optionally written to dump_path
+    if enable:
+        metrics.enable()
+    else:
+        metrics.disable()
+
+    if dump_path:
+        metrics.dump(dump_path)
+
+    return metrics.get_snapshot()
+
+
 #######################################
 # Metodos para ambas aplicaciones
 #######################################
 
+def node_sync_time_job(hw_id: int, group: int, node: int, channel: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
+        address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
+        command=GenericInterfaces.Commands.sync_time,
+        parameter=GenericParameterInterfaces.SyncTime(),
+        matadata_received_dc=GenericInterfaces.MetadataBase
+    )
+
+
 def node_sync_time(retries: int, timeout_ms: int, show: bool, hw_id: int,
                    group: int, node: int, channel: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
+    return _send_job(retries, timeout_ms, show, node_sync_time_job(hw_id, group, node, channel))
+
+
+def node_sync_time_group(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                         group: int, channel: int, nodes: List[int] = None,
+                         broadcast: bool = False) -> List[GatewayResponse]:
+
+    # broadcast also syncs every node of the channel with the same hw_id
+    gw_r_lst = Process.send_group(
         retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
-        address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
+        group=group, channel=channel,
+        nodes=nodes or Process.GROUP_NODES,
         command=GenericInterfaces.Commands.sync_time,
         parameter=GenericParameterInterfaces.SyncTime(),
-        matadata_received_dc=GenericInterfaces.MetadataBase
+        matadata_received_dc=GenericInterfaces.MetadataBase,
+        broadcast=broadcast
     )
 
-    _print_response(show=show, gateway_response=gw_r)
+    for gw_r in gw_r_lst:
+        _print_response(show=show, gateway_response=gw_r)
+
+    return gw_r_lst
+
+
+def node_stop_group(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                    group: int, channel: int, nodes: List[int] = None,
+                    broadcast: bool = False, allow_foreign_groups: bool = False) -> List[GatewayResponse]:
+
+    # broadcast also stops every node of the channel with the same hw_id, so it is
+    # refused with ERROR_WRONG_PARAMETERS unless allow_foreign_groups is set
+    gw_r_lst = Process.send_group(
+        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+        group=group, channel=channel,
+        nodes=nodes or Process.GROUP_NODES,
+        command=GenericInterfaces.Commands.stop,
+        parameter=GenericInterfaces.ParameterBase(),
+        matadata_received_dc=GenericInterfaces.MetadataBase,
+        broadcast=broadcast,
+        allow_foreign_groups=allow_foreign_groups
+    )
+
+    for gw_r in gw_r_lst:
+        _print_response(show=show, gateway_response=gw_r)
+
+    return gw_r_lst
 
-    return gw_r
+
+def node_sync_clocks(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                     group: int, channel: int, nodes: List[int] = None,
+                     threshold_s: float = 5.0, window: int = 1) -> List[ClockSyncResult]:
+
+    # sync_time only for the nodes whose predicted clock offset is above threshold_s
+    sync = ClockSync(retries=retries, timeout_ms=timeout_ms, threshold_s=threshold_s, window=window)
+    results = sync.sync([(hw_id, GenericInterfaces.AddressBase(group=group, node=node, channel=channel))
+                         for node in nodes or Process.GROUP_NODES])
+
+    for result in results:
+        if result.response is not None:
+            _print_response(show=show, gateway_response=result.response)
+
+    return results
 
 
 #######################################
@@ -62,129 +183,148 @@ def node_sync_time(retries: int, timeout_ms: int, show: bool, hw_id: int,
 #######################################
 
 
-def aireador_read_status(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                         group: int, channel: int, node: int) -> GatewayResponse:
-
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_read_status_job(hw_id: int, group: int, channel: int, node: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=GenericInterfaces.Commands.read_status,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=AireadorMetadataInterfaces.ReadStatus
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_read_status(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                         group: int, channel: int, node: int) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, aireador_read_status_job(hw_id, group, channel, node))
 
-def aireador_read_schedule(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                           group: int, channel: int,node: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_read_schedule_job(hw_id: int, group: int, channel: int,node: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=AireadorInterfaces.Commands.read_schedule,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=AireadorMetadataInterfaces.ReadSchedule
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_read_schedule(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                           group: int, channel: int,node: int) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, aireador_read_schedule_job(hw_id, group, channel, node))
 
-def aireador_timer_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                        group: int, channel: int, node: int,
-                        aireadores: int,
-                        capacitor: bool,
-                        duracion: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_timer_mode_job(hw_id: int, group: int, channel: int, node: int,
+                            aireadores: int,
+                            capacitor: bool,
+                            duracion: int,
+                            execution_id: int = None) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=AireadorInterfaces.Commands.run_timer_mode,
         parameter=AireadorParameterInterfaces.TimerMode(
             aireadores=aireadores,
             capacitor=capacitor,
             duracion=duracion
-        ),
+        ).set_execution_id(execution_id),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_timer_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                        group: int, channel: int, node: int,
+                        aireadores: int,
+                        capacitor: bool,
+                        duracion: int,
+                        execution_id: int = None) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show,
+                     aireador_timer_mode_job(hw_id, group, channel, node, aireadores, capacitor, duracion,
+                                             execution_id))
 
-def aireador_standalone_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                             group: int, channel: int, node: int,
-                             aireadores: int,
-                             capacitor: bool,
-                             horarios: List[int]) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_standalone_mode_job(hw_id: int, group: int, channel: int, node: int,
+                                 aireadores: int,
+                                 capacitor: bool,
+                                 horarios: List[int],
+                                 execution_id: int = None) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=AireadorInterfaces.Commands.run_standalone_mode,
         parameter=AireadorParameterInterfaces.ScheduleMode(
             aireadores=aireadores,
             capacitor=capacitor,
             horarios=horarios
-        ),
+        ).set_execution_id(execution_id),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_standalone_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                             group: int, channel: int, node: int,
+                             aireadores: int,
+                             capacitor: bool,
+                             horarios: List[int],
+                             execution_id: int = None) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show,
+                     aireador_standalone_mode_job(hw_id, group, channel, node, aireadores, capacitor, horarios,
+                                                  execution_id))
 
-def aireador_oxygen_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                         group: int, channel: int, node: int,
-                         aireadores: int,
-                         capacitor: bool,
-                         horarios: List[int]) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_oxygen_mode_job(hw_id: int, group: int, channel: int, node: int,
+                             aireadores: int,
+                             capacitor: bool,
+                             horarios: List[int],
+                             execution_id: int = None) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=AireadorInterfaces.Commands.run_oxygen_mode,
         parameter=AireadorParameterInterfaces.ScheduleMode(
             aireadores=aireadores,
             capacitor=capacitor,
             horarios=horarios
-        ),
+        ).set_execution_id(execution_id),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_oxygen_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                         group: int, channel: int, node: int,
+                         aireadores: int,
+                         capacitor: bool,
+                         horarios: List[int],
+                         execution_id: int = None) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show,
+                     aireador_oxygen_mode_job(hw_id, group, channel, node, aireadores, capacitor, horarios,
+                                              execution_id))
 
-def aireador_stop(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                  group: int, node: int, channel: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_stop_job(hw_id: int, group: int, node: int, channel: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=GenericInterfaces.Commands.stop,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_stop(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                  group: int, node: int, channel: int) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, aireador_stop_job(hw_id, group, node, channel))
 
-def aireador_config_capacitor(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                              group: int, channel: int, node: int,
-                              capacitor: bool) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_config_capacitor_job(hw_id: int, group: int, channel: int, node: int,
+                                  capacitor: bool) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=AireadorInterfaces.Commands.set_capacitor,
         parameter=AireadorParameterInterfaces.SetCapacitor(
@@ -193,25 +333,28 @@ def aireador_config_capacitor(retries: int, timeout_ms: int, show: bool, hw_id:
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_config_capacitor(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                              group: int, channel: int, node: int,
+                              capacitor: bool) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, aireador_config_capacitor_job(hw_id, group, channel, node, capacitor))
 
-def aireador_config_bootloader(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                               group: int, node: int, channel: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def aireador_config_bootloader_job(hw_id: int, group: int, node: int, channel: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=GenericInterfaces.Commands.config_boot,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def aireador_config_bootloader(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                               group: int, node: int, channel: int) -> GatewayResponse:
+
+    return _send_job(retries, timeout_ms, show, aireador_config_bootloader_job(hw_id, group, node, channel))
 
 
 #######################################
@@ -219,56 +362,62 @@ def aireador_config_bootloader(retries: int, timeout_ms: int, show: bool, hw_id:
 #######################################
 
 
-def oxigenometro_read_status(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                             group: int, node: int, channel: int) -> GatewayResponse:
-
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def oxigenometro_read_status_job(hw_id: int, group: int, node: int, channel: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=GenericInterfaces.Commands.read_status,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=OxigenometroMetadataInterfaces.ReadStatus
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def oxigenometro_read_status(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                             group: int, node: int, channel: int) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, oxigenometro_read_status_job(hw_id, group, node, channel))
 
-def oxigenometro_standalone_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                                 group: int, node: int, channel: int,
-                                 sampling_time: int,
-                                 samples_to_reset: int,
-                                 salinidad: float) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def oxigenometro_standalone_mode_job(hw_id: int, group: int, node: int, channel: int,
+                                     sampling_time: int,
+                                     samples_to_reset: int,
+                                     salinidad: float,
+                                     execution_id: int = None) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=OxigenometroInterfaces.Commands.standalone_mode,
         parameter=OxigenometroParameterInterfaces.StandaloneMode(
             sampling_time=sampling_time,
             samples_to_reset=samples_to_reset,
             salinidad=salinidad
-        ),
+        ).set_execution_id(execution_id),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def oxigenometro_standalone_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                                 group: int, node: int, channel: int,
+                                 sampling_time: int,
+                                 samples_to_reset: int,
+                                 salinidad: float,
+                                 execution_id: int = None) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show,
+                     oxigenometro_standalone_mode_job(hw_id, group, node, channel, sampling_time, samples_to_reset,
+                                                      salinidad, execution_id))
 
-def oxigenometro_oxygen_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                             group: int, node:int, channel: int,
-                             sampling_time: int,
-                             samples_to_reset: int,
-                             salinidad: float,
-                             threshold_high: float,
-                             threshold_low: float,
-                             slaves: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def oxigenometro_oxygen_mode_job(hw_id: int, group: int, node:int, channel: int,
+                                 sampling_time: int,
+                                 samples_to_reset: int,
+                                 salinidad: float,
+                                 threshold_high: float,
+                                 threshold_low: float,
+                                 slaves: int,
+                                 execution_id: int = None) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=OxigenometroInterfaces.Commands.oxygen_mode,
         parameter=OxigenometroParameterInterfaces.OxygenMode(
@@ -278,37 +427,46 @@ def oxigenometro_oxygen_mode(retries: int, timeout_ms: int, show: bool, hw_id: i
             threshold_high=threshold_high,
             threshold_low=threshold_low,
             slaves=slaves
-        ),
+        ).set_execution_id(execution_id),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def oxigenometro_oxygen_mode(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                             group: int, node:int, channel: int,
+                             sampling_time: int,
+                             samples_to_reset: int,
+                             salinidad: float,
+                             threshold_high: float,
+                             threshold_low: float,
+                             slaves: int,
+                             execution_id: int = None) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show,
+                     oxigenometro_oxygen_mode_job(hw_id, group, node, channel, sampling_time, samples_to_reset,
+                                                  salinidad, threshold_high, threshold_low, slaves, execution_id))
 
-def oxigenometro_stop(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                      group: int, node: int, channel: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def oxigenometro_stop_job(hw_id: int, group: int, node: int, channel: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=GenericInterfaces.Commands.stop,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def oxigenometro_stop(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                      group: int, node: int, channel: int) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, oxigenometro_stop_job(hw_id, group, node, channel))
 
-def oxigenometro_get_samples(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                             group: int, node: int, channel: int,
-                             date: datetime) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def oxigenometro_get_samples_job(hw_id: int, group: int, node: int, channel: int,
+                                 date: datetime.datetime) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=OxigenometroInterfaces.Commands.read_samples,
         parameter=OxigenometroParameterInterfaces.SamplesFrom(
@@ -317,22 +475,38 @@ def oxigenometro_get_samples(retries: int, timeout_ms: int, show: bool, hw_id: i
         matadata_received_dc=OxigenometroMetadataInterfaces.ReadSamples
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def oxigenometro_get_samples(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                             group: int, node: int, channel: int,
+                             date: datetime.datetime) -> GatewayResponse:
 
+    return _send_job(retries, timeout_ms, show, oxigenometro_get_samples_job(hw_id, group, node, channel, date))
 
-def oxigenometro_config_bootloader(retries: int, timeout_ms: int, show: bool, hw_id: int,
-                                   group: int, node: int, channel: int) -> GatewayResponse:
 
-    gw_r = Process.send_command(
-        retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+def oxigenometro_sync_samples(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                              group: int, node: int, channel: int,
+                              watermark_path: str) -> SyncResult:
+
+    sync = SampleSync(retries=retries, timeout_ms=timeout_ms, watermark_path=watermark_path)
+    result = sync.sync_node(hw_id=hw_id, group=group, node=node, channel=channel)
+
+    for gw_r in result.responses:
+        _print_response(show=show, gateway_response=gw_r)
+
+    return result
+
+
+def oxigenometro_config_bootloader_job(hw_id: int, group: int, node: int, channel: int) -> CommandJob:
+    return CommandJob(
+        hw_id=hw_id,
         address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel),
         command=GenericInterfaces.Commands.config_boot,
         parameter=GenericInterfaces.ParameterBase(),
         matadata_received_dc=GenericInterfaces.MetadataBase
     )
 
-    _print_response(show=show, gateway_response=gw_r)
 
-    return gw_r
+def oxigenometro_config_bootloader(retries: int, timeout_ms: int, show: bool, hw_id: int,
+                                   group: int, node: int, channel: int) -> GatewayResponse:
+
+    return _send_job(retries, timeout_ms, show, oxigenometro_config_bootloader_job(hw_id, group, node, channel))
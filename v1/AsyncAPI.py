@@ -0,0 +1,186 @@
+#!/usr/bin/python3.7
+import asyncio, inspect
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from bsp.v1 import API
+
+from bsp.v1.Process import Process, GatewayResponse, CommandJob
+from bsp.v1.Session import GatewaySession
+
+from bsp.v1._generic import interfaces as GenericInterfaces
+
+
+class AsyncGateway():
+    # A single task owns the E22: requests are queued and served one at a time in a
+    # dedicated thread, jobs waiting together are grouped by base station address
+
+    def __init__(self, session: GatewaySession = None, maxsize: int = 0):
+        self.session = session if session is not None else GatewaySession()
+        self.maxsize = maxsize
+
+        self.queue = None
+        self.task = None
+        self.executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self):
+        if self.task is not None:
+            return
+
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task = asyncio.get_event_loop().create_task(self._radio_owner())
+
+    async def stop(self):
+        if self.task is None:
+            return
+
+        await self.queue.put(None)
+        await self.task
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.session.close)
+
+        self.executor.shutdown(wait=True)
+        self.task = None
+        self.executor = None
+
+    async def _radio_owner(self):
+        running = True
+
+        while running:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+
+            # commands other than _send (restart) act as barriers for the reordering
+            segment = []
+            for item in batch:
+                if item[4] == self._send:
+                    segment.append(item)
+                    continue
+
+                await self._serve(segment)
+                await self._serve([item])
+                segment = []
+
+            await self._serve(segment)
+
+    async def _serve(self, batch: list):
+        loop = asyncio.get_event_loop()
+        jobs = [item[2] for item in batch]
+
+        for i in Process._get_schedule(jobs):
+            retries, timeout_ms, job, future, fnc = batch[i]
+
+            if future.cancelled():
+                continue
+
+            try:
+                result = await loop.run_in_executor(self.executor, fnc, retries, timeout_ms, job)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            if not future.done():
+                future.set_result(result)
+
+    def _send(self, retries: int, timeout_ms: int, job: CommandJob) -> GatewayResponse:
+        return self.session.send_command(
+            retries=retries, timeout_ms=timeout_ms, hw_id=job.hw_id,
+            address=job.address,
+            command=job.command,
+            parameter=job.parameter,
+            matadata_received_dc=job.matadata_received_dc
+        )
+
+    def _restart(self, retries: int, timeout_ms: int, job: CommandJob):
+        self.session.restart()
+
+    async def _submit(self, retries: int, timeout_ms: int, job: CommandJob, fnc=None):
+        if self.task is None:
+            await self.start()
+
+        future = asyncio.get_event_loop().create_future()
+        await self.queue.put((retries, timeout_ms, job, future, fnc if fnc is not None else self._send))
+
+        return await future
+
+    async def send_command(self, retries: int, timeout_ms: int, show: bool, job: CommandJob) -> GatewayResponse:
+        gw_r = await self._submit(retries, timeout_ms, job)
+
+        API._print_response(show=show, gateway_response=gw_r)
+
+        return gw_r
+
+    async def send_commands(self, retries: int, timeout_ms: int, show: bool,
+                            jobs: List[CommandJob]) -> List[GatewayResponse]:
+
+        return list(await asyncio.gather(*[self.send_command(retries, timeout_ms, show, job) for job in jobs]))
+
+    #######################################
+    # Metodos para gateway
+    #######################################
+
+    async def gateway_restart(self) -> dict:
+        # the address is only used to order the queue, it is never sent
+        job = CommandJob(hw_id=0,
+                         address=GenericInterfaces.AddressBase(group=0, node=0, channel=0),
+                         command=GenericInterfaces.Commands.stop,
+                         parameter=GenericInterfaces.ParameterBase())
+
+        await self._submit(0, 0, job, fnc=self._restart)
+        # returned instead of printed, stdout belongs to the daemon and the client shows the reply
+        return {"status": "ok"}
+
+
+def _dispatch(build_job: Callable[..., CommandJob]):
+    # coroutine method sending the job of an API builder through the radio owner, with
+    # the signature of the builder so the daemon can bind and convert its arguments
+    async def method(self, retries: int, timeout_ms: int, show: bool, *args, **kwargs) -> GatewayResponse:
+        return await self.send_command(retries, timeout_ms, show, build_job(*args, **kwargs))
+
+    parameters = list(inspect.signature(method).parameters.values())[:4] + \
+                 list(inspect.signature(build_job).parameters.values())
+
+    method.__name__ = method.__qualname__ = build_job.__name__[:-len("_job")]
+    method.__signature__ = inspect.Signature(parameters, return_annotation=GatewayResponse)
+
+    return method
+
+
+for _build_job in (
+        # Metodos para ambas aplicaciones
+        API.node_sync_time_job,
+        # Metodos para aireadores
+        API.aireador_read_status_job,
+        API.aireador_read_schedule_job,
+        API.aireador_timer_mode_job,
+        API.aireador_standalone_mode_job,
+        API.aireador_oxygen_mode_job,
+        API.aireador_stop_job,
+        API.aireador_config_capacitor_job,
+        API.aireador_config_bootloader_job,
+        # Metodos para oxigenometros
+        API.oxigenometro_read_status_job,
+        API.oxigenometro_standalone_mode_job,
+        API.oxigenometro_oxygen_mode_job,
+        API.oxigenometro_stop_job,
+        API.oxigenometro_get_samples_job,
+        API.oxigenometro_config_bootloader_job):
+
+    _method = _dispatch(_build_job)
+    setattr(AsyncGateway, _method.__name__, _method)
+
+del _build_job, _method
@@ -0,0 +1,265 @@
+#!/usr/bin/python3.7
+import argparse, datetime, gc, json, os, sys, time, tracemalloc
+
+from typing import Callable, Dict, List, Tuple
+from dataclasses import dataclass, asdict
+
+from bsp.v1.Process import Process
+from bsp.v1.Simulator import SimulatedAireador, SimulatedOxigenometro, SimulatedNode
+
+from bsp.v1.aireador import interfaces as AireadorInterfaces, metadata_interfaces as AireadorMetadataInterfaces, \
+    parameter_interfaces as AireadorParameterInterfaces
+from bsp.v1.oxygenometro import interfaces as OxigenometroInterfaces, \
+    metadata_interfaces as OxigenometroMetadataInterfaces, parameter_interfaces as OxigenometroParameterInterfaces
+
+from bsp.v1._generic import methods, interfaces as GenericInterfaces, parameter_interfaces as GenericParameterInterfaces
+from bsp.v1._generic.interfaces import AddressBase, Command, DataSendBase, ParameterBase, VersionBase
+
+# committed next to this module, refreshed with --save-baseline
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    ns_per_op: float
+    # peak bytes allocated while running one operation
+    alloc_bytes: int
+
+
+def _measure_time(fn: Callable[[], object], min_time_s: float, repeat: int) -> float:
+    # number of loops grows until one run lasts min_time_s, best of repeat runs
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time_s:
+            break
+
+        loops *= 10 if elapsed < min_time_s / 10 else 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best / loops * 1e9
+
+
+def _measure_alloc(fn: Callable[[], object]) -> int:
+    fn()
+
+    tracemalloc.start()
+    try:
+        tracemalloc.clear_traces()
+        current, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return max(peak - current, 0)
+
+
+def run_benchmark(name: str, fn: Callable[[], object], min_time_s: float = 0.2, repeat: int = 5) -> BenchmarkResult:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        ns_per_op = _measure_time(fn, min_time_s, repeat)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return BenchmarkResult(name=name, ns_per_op=ns_per_op, alloc_bytes=_measure_alloc(fn))
+
+
+#######################################
+# cases
+#######################################
+
+AIREADOR_VERSION = Process.AireadorBlackVersion
+OXIGENOMETRO_VERSION = Process.SotVersion
+ADDRESS = AddressBase(group=100, node=3, channel=10)
+
+# fixed date so every run encodes and decodes the same frames
+SAMPLES_FROM = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _get_parameters() -> List[Tuple[str, Command, VersionBase, ParameterBase]]:
+    return [
+        ("none", GenericInterfaces.Commands.read_status, AIREADOR_VERSION, ParameterBase()),
+        ("sync_time", GenericInterfaces.Commands.sync_time, AIREADOR_VERSION, GenericParameterInterfaces.SyncTime()),
+        ("timer_mode", AireadorInterfaces.Commands.run_timer_mode, AIREADOR_VERSION,
+         AireadorParameterInterfaces.TimerMode(aireadores=4, capacitor=True, duracion=60)),
+        ("schedule_mode", AireadorInterfaces.Commands.run_standalone_mode, AIREADOR_VERSION,
+         AireadorParameterInterfaces.ScheduleMode(aireadores=4, capacitor=True, horarios=list(range(48)))),
+        ("set_capacitor", AireadorInterfaces.Commands.set_capacitor, AIREADOR_VERSION,
+         AireadorParameterInterfaces.SetCapacitor(capacitor=True)),
+        ("samples_from", OxigenometroInterfaces.Commands.read_samples, OXIGENOMETRO_VERSION,
+         OxigenometroParameterInterfaces.SamplesFrom(date=SAMPLES_FROM)),
+        ("standalone_mode", OxigenometroInterfaces.Commands.standalone_mode, OXIGENOMETRO_VERSION,
+         OxigenometroParameterInterfaces.StandaloneMode(sampling_time=10, samples_to_reset=0, salinidad=3.5)),
+        ("oxygen_mode", OxigenometroInterfaces.Commands.oxygen_mode, OXIGENOMETRO_VERSION,
+         OxigenometroParameterInterfaces.OxygenMode(sampling_time=10, samples_to_reset=0, salinidad=3.5,
+                                                    threshold_high=6.0, threshold_low=4.0, slaves=2)),
+    ]
+
+
+def _get_reply(node: SimulatedNode, command: Command, parameter: ParameterBase) -> List[int]:
+    # reply frame of the simulated firmware plus the rssi byte the E22 appends
+    data_send = DataSendBase(address=node.address, version=node.version, command=command.command_send,
+                             parameter=parameter)
+    return list(node.handle(data_send.get_raw_bytes()[3:])) + [120]
+
+
+def get_cases() -> List[Tuple[str, Callable[[], object]]]:
+    cases = []
+
+    # ----------------------------------------
+    # frames sent
+    for name, command, version, parameter in _get_parameters():
+        data_send = DataSendBase(address=ADDRESS, version=version, command=command.command_send, parameter=parameter)
+        cases.append(("get_raw." + name, data_send.get_raw))
+
+    # ----------------------------------------
+    # crc
+    short = bytes(range(12))
+    full = bytes(i & 0xFF for i in range(235))
+    cases.append(("calculate_crc.12", lambda: methods.calculate_crc(short)))
+    cases.append(("calculate_crc.235", lambda: methods.calculate_crc(full)))
+
+    # ----------------------------------------
+    # frames received
+    aireador = SimulatedAireador(ADDRESS, AIREADOR_VERSION)
+    aireador.port_out = 0x0F
+    aireador.mode = aireador.TIMER
+    aireador.timer_end = float("inf")
+
+    oxigenometro = SimulatedOxigenometro(ADDRESS, OXIGENOMETRO_VERSION)
+    # one run long enough to fill the largest read samples frame
+    start = SAMPLES_FROM.timestamp()
+    oxigenometro.runs.append([start, start + 86400, 600])
+
+    read_status = GenericInterfaces.Commands.read_status
+    read_samples = OxigenometroInterfaces.Commands.read_samples
+    samples_from = OxigenometroParameterInterfaces.SamplesFrom(date=SAMPLES_FROM)
+
+    aireador_status = _get_reply(aireador, read_status, ParameterBase())
+    oxigenometro_status = _get_reply(oxigenometro, read_status, ParameterBase())
+    oxigenometro_samples = _get_reply(oxigenometro, read_samples, samples_from)
+
+    def aireador_data_received(stream, metadata_dc):
+        return lambda: AireadorInterfaces.DataReceived(stream=stream, address=ADDRESS, version_p=AIREADOR_VERSION,
+                                                       command_p=read_status.command_received,
+                                                       parameter_p=ParameterBase(), metadata_dc=metadata_dc)
+
+    def oxigenometro_data_received(stream, command, parameter, metadata_dc):
+        return lambda: OxigenometroInterfaces.DataReceived(stream=stream, address=ADDRESS,
+                                                           version_p=OXIGENOMETRO_VERSION,
+                                                           command_p=command.command_received,
+                                                           parameter_p=parameter, metadata_dc=metadata_dc)
+
+    cases.append(("data_received.aireador.read_status",
+                  aireador_data_received(aireador_status, AireadorMetadataInterfaces.ReadStatus)))
+    cases.append(("data_received.oxigenometro.read_status",
+                  oxigenometro_data_received(oxigenometro_status, read_status, ParameterBase(),
+                                             OxigenometroMetadataInterfaces.ReadStatus)))
+    cases.append(("data_received.oxigenometro.read_samples",
+                  oxigenometro_data_received(oxigenometro_samples, read_samples, samples_from,
+                                             OxigenometroMetadataInterfaces.ReadSamples)))
+
+    # ----------------------------------------
+    # metadata
+    aireador_data = bytes(aireador_status[11:-5])
+    samples_data = bytes(oxigenometro_samples[9:-5])
+
+    cases.append(("metadata.aireador.read_status", lambda: AireadorMetadataInterfaces.ReadStatus(aireador_data)))
+    cases.append(("metadata.aireador.tablero_status",
+                  lambda: AireadorMetadataInterfaces.TableroStatus(port_in=0x1FF, port_out_live=0x1F)))
+    cases.append(("metadata.oxigenometro.read_samples.max",
+                  lambda: OxigenometroMetadataInterfaces.ReadSamples(samples_data)))
+    cases.append(("metadata.oxigenometro.read_samples_columns.max",
+                  lambda: OxigenometroMetadataInterfaces.ReadSamplesColumns(samples_data)))
+
+    return cases
+
+
+#######################################
+# baseline
+#######################################
+
+def load_baseline(path: str) -> Dict[str, BenchmarkResult]:
+    with open(path) as f:
+        return {name: BenchmarkResult(**result) for name, result in json.load(f).items()}
+
+
+def save_baseline(path: str, results: List[BenchmarkResult]):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({result.name: asdict(result) for result in results}, f, indent=1)
+
+    os.replace(tmp, path)
+
+
+def get_regressions(results: List[BenchmarkResult], baseline: Dict[str, BenchmarkResult],
+                    tolerance: float) -> List[str]:
+    regressions = []
+
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+
+        if result.ns_per_op > base.ns_per_op * (1 + tolerance):
+            regressions.append("{}: {:.0f} ns/op, baseline {:.0f}".format(result.name, result.ns_per_op,
+                                                                          base.ns_per_op))
+
+        # small absolute margin, allocator rounding moves a few bytes between runs
+        if result.alloc_bytes > base.alloc_bytes * (1 + tolerance) + 64:
+            regressions.append("{}: {} bytes/op, baseline {}".format(result.name, result.alloc_bytes,
+                                                                     base.alloc_bytes))
+
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="protocol encode/decode micro benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline json to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--filter", default="", help="only cases whose name contains this text")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, fn in get_cases():
+        if args.filter not in name:
+            continue
+
+        result = run_benchmark(name, fn, min_time_s=args.min_time)
+        results.append(result)
+        print("{:<50} {:>12.0f} ns/op {:>10} bytes/op".format(result.name, result.ns_per_op, result.alloc_bytes))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return 0
+
+    # without a baseline nothing could be compared, which must not pass as no regressions
+    if not os.path.exists(args.baseline):
+        print("no baseline at {}, store one with --save-baseline".format(args.baseline), file=sys.stderr)
+        return 2
+
+    regressions = get_regressions(results, load_baseline(args.baseline), args.tolerance)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/python3.7
+# Thin client of the gateway daemon (Daemon.py), only the standard library is
+# imported so a call costs an interpreter start and one round trip on the socket
+import json, os, socket, sys
+
+DEFAULT_SOCKET_PATH = os.environ.get("BSP_GATEWAY_SOCKET", "/tmp/bsp_gateway.sock")
+
+
+class GatewayClient():
+    # one connection reused for every call
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout_s: float = None):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+
+        self.sock = None
+        self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def connect(self):
+        if self.sock is not None:
+            return
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout_s)
+        self.sock.connect(self.socket_path)
+        self.stream = self.sock.makefile("rb")
+
+    def close(self):
+        if self.sock is None:
+            return
+
+        self.stream.close()
+        self.sock.close()
+        self.sock = None
+        self.stream = None
+
+    def call_raw(self, function: str, *args, **kwargs) -> bytes:
+        # response as the json line sent by the daemon
+        self.connect()
+
+        request = json.dumps({"function": function, "args": args, "kwargs": kwargs}, default=str)
+        self.sock.sendall(request.encode("utf-8") + b"\n")
+
+        line = self.stream.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("gateway daemon closed the connection")
+
+        return line
+
+    def call(self, function: str, *args, **kwargs) -> dict:
+        response = json.loads(self.call_raw(function, *args, **kwargs))
+
+        if isinstance(response, dict) and "error" in response and len(response) == 1:
+            raise RuntimeError(response["error"])
+
+        return response
+
+
+def call(function: str, *args, socket_path: str = DEFAULT_SOCKET_PATH, **kwargs) -> dict:
+    with GatewayClient(socket_path) as client:
+        return client.call(function, *args, **kwargs)
+
+
+def main(argv=None) -> int:
+    # python -m bsp.v1.Client aireador_read_status 3 1000 true 3 5 4 1
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: Client.py function [args...]")
+        return 2
+
+    with GatewayClient() as client:
+        line = client.call_raw(argv[0], *argv[1:])
+
+    sys.stdout.write(line.decode("utf-8"))
+    return 1 if line.startswith(b'{"error"') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/python3.7
+import collections, datetime, threading, time
+
+from typing import Deque, Dict, Tuple, Union
+from dataclasses import dataclass
+
+from bsp.v1.LinkQuality import trend
+
+from bsp.v1._generic import utils
+from bsp.v1._generic.interfaces import AddressBase, DataReceivedBase
+
+
+@dataclass
+class ClockEstimate:
+    # node clock minus gateway clock, None when the node was never heard
+    offset_s: Union[float, None] = None
+    drift_ppm: Union[float, None] = None
+    samples: int = 0
+    last_sample: Union[float, None] = None
+    synced_at: Union[float, None] = None
+
+
+class ClockDrift():
+    # Clock offset of every node measured from the timestamps its replies already
+    # carry (node_date of the aireador header, device_date of the oxigenometro
+    # status). Offsets since the last sync are fitted by least squares to get the
+    # drift, which is kept across syncs since it belongs to the node crystal.
+    # Node timestamps are whole seconds, so offsets are only good to about 1 s and
+    # drift needs samples spread over hours.
+
+    def __init__(self, size: int = 64, min_span_s: float = 3600.0):
+        self.size = size
+        self.min_span_s = min_span_s
+
+        self.lock = threading.Lock()
+        # (gateway time, offset) since the last sync
+        self.samples: Dict[Tuple[int, int, int], Deque[Tuple[float, float]]] = {}
+        self.drifts: Dict[Tuple[int, int, int], float] = {}
+        self.synced: Dict[Tuple[int, int, int], float] = {}
+        self.counts: Dict[Tuple[int, int, int], int] = {}
+
+    @staticmethod
+    def _get_key(address: AddressBase) -> Tuple[int, int, int]:
+        return address.group, address.node, address.channel
+
+    @staticmethod
+    def get_node_date(data_received: DataReceivedBase) -> Union[datetime.datetime, None]:
+        if data_received.status != utils.OK:
+            return None
+
+        node_date = getattr(data_received, "node_date", None)
+        if node_date is not None:
+            return node_date
+
+        metadata = getattr(data_received, "metadata", None)
+        if metadata is None or not metadata.valid:
+            return None
+
+        return getattr(metadata, "device_date", None)
+
+    def add_sample(self, address: AddressBase, node_timestamp: float, timestamp: float = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        # node clock truncates to the second, the middle of that second is used
+        offset_s = node_timestamp + 0.5 - timestamp
+
+        key = self._get_key(address)
+        with self.lock:
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = collections.deque(maxlen=self.size)
+                self.samples[key] = samples
+
+            samples.append((timestamp, offset_s))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+            drift_ppm = self._fit(samples)
+            if drift_ppm is not None:
+                self.drifts[key] = drift_ppm
+
+    def add_received(self, address: AddressBase, data_received: DataReceivedBase, timestamp: float = None):
+        node_date = self.get_node_date(data_received)
+        if node_date is None:
+            return
+
+        self.add_sample(address, node_date.timestamp(), timestamp)
+
+    def add_sync(self, address: AddressBase, timestamp: float = None):
+        # node clock was just set to the gateway clock, offset starts again at zero
+        timestamp = time.time() if timestamp is None else timestamp
+
+        key = self._get_key(address)
+        with self.lock:
+            self.samples[key] = collections.deque([(timestamp, 0.0)], maxlen=self.size)
+            self.synced[key] = timestamp
+
+    def _fit(self, samples: Deque[Tuple[float, float]]) -> Union[float, None]:
+        if len(samples) < 2 or samples[-1][0] - samples[0][0] < self.min_span_s:
+            return None
+
+        slope = trend(samples)
+        return slope / 3600 * 1e6 if slope is not None else None
+
+    def get_offset(self, address: AddressBase, timestamp: float = None) -> Union[float, None]:
+        # offset predicted at timestamp from the last sample and the drift
+        timestamp = time.time() if timestamp is None else timestamp
+
+        key = self._get_key(address)
+        with self.lock:
+            samples = self.samples.get(key)
+            if not samples:
+                return None
+
+            last_timestamp, last_offset_s = samples[-1]
+            drift_ppm = self.drifts.get(key, 0.0)
+
+        return last_offset_s + (timestamp - last_timestamp) * drift_ppm / 1e6
+
+    def needs_sync(self, address: AddressBase, threshold_s: float, timestamp: float = None) -> bool:
+        offset_s = self.get_offset(address, timestamp)
+        return offset_s is None or abs(offset_s) > threshold_s
+
+    def get_estimate(self, address: AddressBase, timestamp: float = None) -> ClockEstimate:
+        offset_s = self.get_offset(address, timestamp)
+
+        key = self._get_key(address)
+        with self.lock:
+            samples = self.samples.get(key)
+            return ClockEstimate(offset_s=offset_s,
+                                 drift_ppm=self.drifts.get(key),
+                                 samples=self.counts.get(key, 0),
+                                 last_sample=samples[-1][0] if samples else None,
+                                 synced_at=self.synced.get(key))
+
+    def reset(self, address: Union[AddressBase, None] = None):
+        with self.lock:
+            if address is None:
+                self.samples = {}
+                self.drifts = {}
+                self.synced = {}
+                self.counts = {}
+                return
+
+            key = self._get_key(address)
+            for values in (self.samples, self.drifts, self.synced, self.counts):
+                values.pop(key, None)
@@ -0,0 +1,86 @@
+#!/usr/bin/python3.7
+import time
+
+from typing import List, Tuple, Union
+from dataclasses import dataclass, field
+
+from bsp.v1.Process import Process, GatewayResponse, CommandJob
+from bsp.v1.Session import GatewaySession
+from bsp.v1.ClockDrift import ClockDrift
+
+from bsp.v1._generic import utils, interfaces as GenericInterfaces, \
+    parameter_interfaces as GenericParameterInterfaces
+
+
+@dataclass
+class ClockSyncResult:
+    address: GenericInterfaces.AddressBase
+    # predicted before deciding, None when the node was never heard
+    offset_s: Union[float, None] = None
+    drift_ppm: Union[float, None] = None
+    synced: bool = False
+    # empty when the node did not need a sync
+    status: str = ""
+    response: Union[GatewayResponse, None] = field(repr=False, default=None)
+
+
+class ClockSync():
+    # Sends SYNC_TIME only to the nodes whose predicted clock offset is above
+    # threshold_s, using the offsets Process.clock_drift measures from every reply.
+    # Nodes never heard are synced too.
+
+    def __init__(self,
+                 retries: int,
+                 timeout_ms: int,
+                 threshold_s: float = 5.0,
+                 window: int = 1,
+                 session: GatewaySession = None,
+                 clock_drift: ClockDrift = None):
+
+        self.retries = retries
+        self.timeout_ms = timeout_ms
+        self.threshold_s = threshold_s
+        self.window = window
+        self.session = session
+        self.clock_drift = clock_drift if clock_drift is not None else Process.clock_drift
+
+    def _send_commands(self, jobs: List[CommandJob]) -> List[GatewayResponse]:
+        if self.session is not None:
+            return self.session.send_commands(self.retries, self.timeout_ms, jobs, window=self.window)
+
+        return Process.send_commands(self.retries, self.timeout_ms, jobs, window=self.window)
+
+    def sync(self, nodes: List[Tuple[int, GenericInterfaces.AddressBase]], force: bool = False) -> List[ClockSyncResult]:
+        # nodes as (hw_id, address)
+        now = time.time()
+
+        results = []
+        jobs = []
+        indexes = []
+        for hw_id, address in nodes:
+            estimate = self.clock_drift.get_estimate(address, now)
+            results.append(ClockSyncResult(address=address, offset_s=estimate.offset_s,
+                                           drift_ppm=estimate.drift_ppm))
+
+            if not force and not self.clock_drift.needs_sync(address, self.threshold_s, now):
+                continue
+
+            indexes.append(len(results) - 1)
+            jobs.append(CommandJob(hw_id=hw_id, address=address,
+                                   command=GenericInterfaces.Commands.sync_time,
+                                   parameter=GenericParameterInterfaces.SyncTime(),
+                                   matadata_received_dc=GenericInterfaces.MetadataBase))
+
+        if not jobs:
+            return results
+
+        for i, gw_r in zip(indexes, self._send_commands(jobs)):
+            result = results[i]
+            result.response = gw_r
+            result.status = gw_r.status.base_station if gw_r.status.base_station != utils.OK else gw_r.status.node
+
+            if gw_r.is_response_ok():
+                self.clock_drift.add_sync(result.address)
+                result.synced = True
+
+        return results
@@ -0,0 +1,190 @@
+#!/usr/bin/python3.7
+import datetime
+
+from typing import NamedTuple, Union, Type
+
+from bsp.v1.aireador import interfaces as AireadorInterfaces, metadata_interfaces as AireadorMetadataInterfaces
+from bsp.v1.oxygenometro import interfaces as OxigenometroInterfaces, \
+    metadata_interfaces as OxigenometroMetadataInterfaces
+
+from bsp.v1._generic import utils
+from bsp.v1._generic.interfaces import AddressBase, MetadataBase
+
+
+def _to_date(timestamp: Union[int, None]) -> Union[datetime.datetime, None]:
+    if timestamp is None:
+        return None
+
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).astimezone()
+
+
+def _to_timestamp(date: Union[datetime.datetime, None]) -> Union[int, None]:
+    if date is None:
+        return None
+
+    return int(date.timestamp())
+
+
+class AireadorStatus(NamedTuple):
+    mode: str
+    port_in: int
+    port_out: int
+    port_out_live: int
+
+    @property
+    def tablero(self) -> AireadorMetadataInterfaces.TableroStatus:
+        return AireadorMetadataInterfaces.TableroStatus(port_in=self.port_in, port_out_live=self.port_out_live)
+
+
+class AireadorSchedule(NamedTuple):
+    port_out: int
+    schedule: bytes
+
+
+class OxigenometroStatus(NamedTuple):
+    mode: str
+    app_status: str
+    modbus_status: str
+    storage_status: str
+    device_timestamp: Union[int, None]
+
+    @property
+    def device_date(self) -> Union[datetime.datetime, None]:
+        return _to_date(self.device_timestamp)
+
+
+class OxigenometroSamples(NamedTuple):
+    status: OxigenometroStatus
+    salinity: Union[float, None]
+    samples: OxigenometroMetadataInterfaces.SampleColumns
+
+
+class CompactResponse(NamedTuple):
+    # Response kept once the command is over. The command is still decoded through
+    # GatewayResponse and DataReceived, which are dropped right after, so compact
+    # mode lowers the memory held by large result sets, not the allocations made
+    # while a command runs (except samples, decoded straight into columns).
+    group: int
+    node: int
+    channel: int
+
+    base_station: str
+    node_status: str
+    attempts: int
+
+    command: Union[int, None] = None
+    rssi: Union[float, None] = None
+    temperature: Union[float, None] = None
+    humidity: Union[float, None] = None
+
+    # aireador
+    node_timestamp: Union[int, None] = None
+
+    # oxigenometro
+    battery: Union[float, None] = None
+    solar_panel: Union[str, None] = None
+
+    metadata: Union[AireadorStatus, AireadorSchedule, OxigenometroStatus, OxigenometroSamples, None] = None
+
+    def is_response_ok(self) -> bool:
+        return self.base_station == utils.OK and self.node_status == utils.OK
+
+    @property
+    def address(self) -> AddressBase:
+        return AddressBase(group=self.group, node=self.node, channel=self.channel)
+
+    @property
+    def node_date(self) -> Union[datetime.datetime, None]:
+        return _to_date(self.node_timestamp)
+
+    @staticmethod
+    def from_response(gw_r) -> Union['CompactResponse', None]:
+        if gw_r is None:
+            return None
+
+        address = gw_r.address
+        status = gw_r.status
+        data_received = gw_r.data_received
+
+        if not isinstance(data_received, (AireadorInterfaces.DataReceived, OxigenometroInterfaces.DataReceived)):
+            return CompactResponse(group=address.group, node=address.node, channel=address.channel,
+                                   base_station=status.base_station, node_status=status.node,
+                                   attempts=status.attempts)
+
+        command = getattr(data_received, "command", None)
+
+        return CompactResponse(
+            group=address.group,
+            node=address.node,
+            channel=address.channel,
+            base_station=status.base_station,
+            node_status=status.node,
+            attempts=status.attempts,
+            command=command.code if command is not None else None,
+            rssi=getattr(data_received, "rssi", None),
+            temperature=getattr(data_received, "temperature", None),
+            humidity=getattr(data_received, "humidity", None),
+            node_timestamp=_to_timestamp(getattr(data_received, "node_date", None)),
+            battery=getattr(data_received, "battery", None),
+            solar_panel=getattr(data_received, "solar_panel", None),
+            metadata=compact_metadata(getattr(data_received, "metadata", None))
+        )
+
+
+def compact_metadata_dc(metadata_dc: Union[Type[MetadataBase], MetadataBase]) -> Union[Type[MetadataBase], MetadataBase]:
+    # samples are decoded straight into columns when a compact response is requested
+    if metadata_dc is OxigenometroMetadataInterfaces.ReadSamples:
+        return OxigenometroMetadataInterfaces.ReadSamplesColumns
+
+    return metadata_dc
+
+
+def _compact_oxigenometro_status(metadata: OxigenometroMetadataInterfaces.ReadStatus) -> OxigenometroStatus:
+    return OxigenometroStatus(mode=metadata.mode,
+                              app_status=metadata.app_status,
+                              modbus_status=metadata.modbus_status,
+                              storage_status=metadata.storage_status,
+                              device_timestamp=_to_timestamp(getattr(metadata, "device_date", None)))
+
+
+def compact_metadata(metadata: Union[MetadataBase, None]):
+    if metadata is None or not metadata.valid:
+        return None
+
+    if isinstance(metadata, AireadorMetadataInterfaces.ReadStatus):
+        return AireadorStatus(mode=metadata.mode,
+                              port_in=metadata.port_in,
+                              port_out=metadata.port_out,
+                              port_out_live=metadata.port_out_live)
+
+    if isinstance(metadata, AireadorMetadataInterfaces.ReadSchedule):
+        return AireadorSchedule(port_out=metadata.port_out, schedule=bytes(metadata.schedule))
+
+    if isinstance(metadata, OxigenometroMetadataInterfaces.ReadSamplesColumns):
+        return OxigenometroSamples(status=_compact_oxigenometro_status(metadata),
+                                   salinity=getattr(metadata, "salinity", None),
+                                   samples=metadata.samples)
+
+    if isinstance(metadata, OxigenometroMetadataInterfaces.ReadSamples):
+        samples = OxigenometroMetadataInterfaces.SampleColumns()
+        for sample in metadata.samples:
+            samples.timestamp.append(int(sample.date.timestamp()))
+            samples.dissolve_oxygen_concentration.append(sample.dissolve_oxygen_concentration)
+            samples.doc_dqid.append(sample.doc_dqid)
+            samples.temperature.append(sample.temperature)
+            samples.temp_dqid.append(sample.temp_dqid)
+            samples.dissolve_oxygen_saturation.append(sample.dissolve_oxygen_saturation)
+            samples.dos_dqid.append(sample.dos_dqid)
+            samples.oxygen_partial_pressure.append(sample.oxygen_partial_pressure)
+            samples.opp_dqid.append(sample.opp_dqid)
+            samples.internal_temperature.append(sample.internal_temperature)
+            samples.internal_humidity.append(sample.internal_humidity)
+
+        return OxigenometroSamples(status=_compact_oxigenometro_status(metadata),
+                                   salinity=getattr(metadata, "salinity", None),
+                                   samples=samples)
+
+    if isinstance(metadata, OxigenometroMetadataInterfaces.ReadStatus):
+        return _compact_oxigenometro_status(metadata)
+
+    return None
@@ -0,0 +1,145 @@
+#!/usr/bin/python3.7
+import argparse, asyncio, datetime, inspect, json, os, signal, sys
+
+from typing import Any, Callable, Dict, List
+
+from bsp.v1 import API
+from bsp.v1.AsyncAPI import AsyncGateway
+from bsp.v1.Client import DEFAULT_SOCKET_PATH
+
+from bsp.v1._generic import serializer
+
+FUNCTION_PREFIXES = ("gateway_", "node_", "aireador_", "oxigenometro_")
+
+
+def _convert(value: Any, annotation: Any) -> Any:
+    # arguments coming from the command line client are all strings
+    if not isinstance(value, str) or annotation is str:
+        return value
+
+    if annotation is bool:
+        return value.lower() in ("1", "true", "yes", "si")
+
+    if annotation is int or annotation is float:
+        return annotation(value)
+
+    if annotation is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+
+    if getattr(annotation, "__origin__", None) in (list, List):
+        return json.loads(value)
+
+    return value
+
+
+class GatewayDaemon():
+    # Owns the radio through one AsyncGateway and serves the API functions over a
+    # unix socket: one json request per line, one json response per line
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, gateway: AsyncGateway = None):
+        self.socket_path = socket_path
+        self.gateway = gateway if gateway is not None else AsyncGateway()
+
+        self.server = None
+        self.functions: Dict[str, Callable] = {"gateway_metrics": API.gateway_metrics}
+
+        for name, fnc in inspect.getmembers(self.gateway, inspect.iscoroutinefunction):
+            if name.startswith(FUNCTION_PREFIXES):
+                self.functions[name] = fnc
+
+    async def start(self):
+        await self.gateway.start()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+        await self.gateway.stop()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            await self.stop()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                writer.write(await self._process(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _process(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+            fnc = self.functions.get(request.get("function"))
+            if fnc is None:
+                raise ValueError("unknown function {}".format(request.get("function")))
+
+            signature = inspect.signature(fnc)
+            arguments = signature.bind(*request.get("args", []), **request.get("kwargs", {})).arguments
+
+            for name, value in arguments.items():
+                arguments[name] = _convert(value, signature.parameters[name].annotation)
+
+            # responses are printed by the client
+            if "show" in arguments:
+                arguments["show"] = False
+
+            result = fnc(**arguments)
+            if inspect.isawaitable(result):
+                result = await result
+
+        except Exception as e:
+            return (json.dumps({"error": "{}: {}".format(type(e).__name__, e)}) + "\n").encode("utf-8")
+
+        if result is None:
+            result = {"status": "ok"}
+
+        return (serializer.dumps_json(result) + "\n").encode("utf-8")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="gateway daemon owning the E22 radio")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="unix socket path")
+    args = parser.parse_args(argv)
+
+    daemon = GatewayDaemon(socket_path=args.socket)
+
+    loop = asyncio.get_event_loop()
+    loop.add_signal_handler(signal.SIGTERM, loop.stop)
+
+    try:
+        loop.run_until_complete(daemon.start())
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(daemon.stop())
+        loop.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/python3.7
+import argparse, datetime, json, random, sys, time
+
+from typing import List, Tuple, Union
+from dataclasses import dataclass, asdict
+
+from bsp.v1 import API
+from bsp.v1.Process import Process, CommandJob
+from bsp.v1.Simulator import E22Simulator
+
+from bsp.v1.oxygenometro import interfaces as OxigenometroInterfaces, \
+    metadata_interfaces as OxigenometroMetadataInterfaces, parameter_interfaces as OxigenometroParameterInterfaces
+from bsp.v1.aireador import metadata_interfaces as AireadorMetadataInterfaces
+
+from bsp.v1._generic import interfaces as GenericInterfaces
+from bsp.v1._generic.interfaces import AddressBase
+
+NODES_PER_GROUP = 7
+
+AIREADOR = "aireador"
+OXIGENOMETRO = "oxigenometro"
+
+
+@dataclass
+class FleetScenario:
+    groups: int = 10
+    channels: int = 2
+    # the last nodes of every group are oxigenometros, their command reads samples
+    oxigenometros_per_group: int = 1
+    sweeps: int = 3
+    loss: float = 0.0
+    corruption: float = 0.0
+    latency_ms: float = 60.0
+    jitter_ms: float = 10.0
+    mode_switch_ms: float = 20.0
+    retries: int = 3
+    timeout_ms: int = 300
+    # "api": one API call per command in fleet order, "batch": API.gateway_send_batch
+    mode: str = "api"
+    # commands of a group in flight at once in batch mode
+    window: int = 1
+    shuffle: bool = False
+    # real sleeps in the simulated radio instead of a virtual clock
+    realtime: bool = False
+    seed: int = 1
+
+
+@dataclass
+class FleetResult:
+    commands: int
+    ok: int
+    seconds: float
+    commands_per_s: float
+    mean_ms: float
+    # only for the api mode, the commands of a batch are not timed one by one
+    p50_ms: Union[float, None]
+    p99_ms: Union[float, None]
+    reconfigurations_per_sweep: float
+    radio_sent: int
+    radio_lost: int
+
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def _get_fleet(scenario: FleetScenario) -> List[Tuple[str, AddressBase]]:
+    fleet = []
+    for group in range(1, scenario.groups + 1):
+        channel = group % scenario.channels
+
+        for node in range(1, NODES_PER_GROUP + 1):
+            kind = OXIGENOMETRO if node > NODES_PER_GROUP - scenario.oxigenometros_per_group else AIREADOR
+            fleet.append((kind, AddressBase(group=group, node=node, channel=channel)))
+
+    return fleet
+
+
+def _get_simulator(scenario: FleetScenario, fleet: List[Tuple[str, AddressBase]]) -> E22Simulator:
+    simulator = E22Simulator(latency_ms=scenario.latency_ms, jitter_ms=scenario.jitter_ms, loss=scenario.loss,
+                             corruption=scenario.corruption, mode_switch_ms=scenario.mode_switch_ms,
+                             realtime=scenario.realtime, seed=scenario.seed)
+
+    now = time.time()
+    for kind, address in fleet:
+        if kind == AIREADOR:
+            simulator.add_aireador(address.group, address.node, address.channel)
+            continue
+
+        # sampling every 10 minutes since yesterday
+        node = simulator.add_oxigenometro(address.group, address.node, address.channel)
+        node.runs.append([now - 86400, None, 600])
+
+    return simulator
+
+
+def _send(scenario: FleetScenario, kind: str, address: AddressBase, date: datetime.datetime):
+    if kind == AIREADOR:
+        return API.aireador_read_status(scenario.retries, scenario.timeout_ms, False, Process.AireadorBlackVersion.HW,
+                                        address.group, address.channel, address.node)
+
+    return API.oxigenometro_get_samples(scenario.retries, scenario.timeout_ms, False, Process.SotVersion.HW,
+                                        address.group, address.node, address.channel, date)
+
+
+def _get_job(kind: str, address: AddressBase, date: datetime.datetime) -> CommandJob:
+    if kind == AIREADOR:
+        return CommandJob(hw_id=Process.AireadorBlackVersion.HW, address=address,
+                          command=GenericInterfaces.Commands.read_status,
+                          parameter=GenericInterfaces.ParameterBase(),
+                          matadata_received_dc=AireadorMetadataInterfaces.ReadStatus)
+
+    return CommandJob(hw_id=Process.SotVersion.HW, address=address,
+                      command=OxigenometroInterfaces.Commands.read_samples,
+                      parameter=OxigenometroParameterInterfaces.SamplesFrom(date=date),
+                      matadata_received_dc=OxigenometroMetadataInterfaces.ReadSamples)
+
+
+def run_scenario(scenario: FleetScenario) -> FleetResult:
+    # Latency of a command is wall time plus the virtual time the simulated radio
+    # spent waiting, so realtime and virtual runs give comparable numbers.
+
+    fleet = _get_fleet(scenario)
+    simulator = _get_simulator(scenario, fleet)
+
+    transport = Process.transport
+    Process.set_transport(simulator)
+
+    order = random.Random(scenario.seed)
+
+    def now() -> float:
+        return time.perf_counter() + simulator.elapsed_s
+
+    latencies = []
+    busy = 0.0
+    ok = 0
+    start = now()
+
+    try:
+        for _ in range(scenario.sweeps):
+            sweep = list(fleet)
+            if scenario.shuffle:
+                order.shuffle(sweep)
+
+            date = datetime.datetime.now() - datetime.timedelta(hours=1)
+
+            if scenario.mode == "batch":
+                sweep_start = now()
+                responses = API.gateway_send_batch(scenario.retries, scenario.timeout_ms, False,
+                                                   [_get_job(kind, address, date) for kind, address in sweep],
+                                                   window=scenario.window)
+                busy += now() - sweep_start
+                ok += sum(1 for gw_r in responses if gw_r.is_response_ok())
+                continue
+
+            for kind, address in sweep:
+                command_start = now()
+                gw_r = _send(scenario, kind, address, date)
+                latencies.append(now() - command_start)
+                busy += latencies[-1]
+                ok += gw_r.is_response_ok()
+    finally:
+        Process.set_transport(transport)
+
+    seconds = now() - start
+    commands = len(fleet) * scenario.sweeps
+
+    return FleetResult(commands=commands,
+                       ok=ok,
+                       seconds=seconds,
+                       commands_per_s=commands / seconds if seconds else 0.0,
+                       mean_ms=busy / commands * 1000 if commands else 0.0,
+                       p50_ms=_percentile(latencies, 50) * 1000 if latencies else None,
+                       p99_ms=_percentile(latencies, 99) * 1000 if latencies else None,
+                       reconfigurations_per_sweep=simulator.stats["register_writes"] / scenario.sweeps,
+                       radio_sent=simulator.stats["sent"],
+                       radio_lost=simulator.stats["lost"])
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="gateway throughput against a simulated fleet")
+
+    defaults = FleetScenario()
+    for name, value in asdict(defaults).items():
+        option = "--" + name.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(option, action="store_true", default=value)
+        else:
+            parser.add_argument(option, type=type(value), default=value)
+
+    args = parser.parse_args(argv)
+
+    result = run_scenario(FleetScenario(**vars(args)))
+    print(json.dumps(asdict(result), indent=1))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
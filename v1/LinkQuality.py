@@ -0,0 +1,131 @@
+#!/usr/bin/python3.7
+import collections, threading, time
+
+from typing import Deque, Dict, List, Sequence, Tuple, Union
+from dataclasses import dataclass
+
+from bsp.v1._generic.interfaces import AddressBase
+
+
+@dataclass
+class LinkRecord:
+    timestamp: float
+    # None when the node never answered with a valid frame
+    rssi: Union[float, None]
+    attempts: int
+    crc_failures: int
+    timeouts: int
+
+
+@dataclass
+class LinkSummary:
+    count: int = 0
+    replies: int = 0
+    rssi_p10: Union[float, None] = None
+    rssi_p50: Union[float, None] = None
+    rssi_p90: Union[float, None] = None
+    # dBm per hour, negative when the link is degrading
+    rssi_trend: Union[float, None] = None
+    mean_attempts: float = 0.0
+    crc_failures: int = 0
+    timeouts: int = 0
+    loss_rate: float = 0.0
+
+
+def percentile(values: Sequence[float], p: float) -> Union[float, None]:
+    # linear interpolation between the closest ranks
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def trend(points: Sequence[Tuple[float, float]]) -> Union[float, None]:
+    # least squares slope of (seconds, value) in value per hour
+    if len(points) < 2:
+        return None
+
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+
+    den = sum((x - mean_x) ** 2 for x, _ in points)
+    if den == 0:
+        return None
+
+    num = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return num / den * 3600
+
+
+class LinkHistory():
+    # Bounded history per node of the last commands sent: rssi of the reply, failed
+    # attempts, crc failures and timeouts, with summaries to spot degrading links
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+        self.lock = threading.Lock()
+        self.records: Dict[Tuple[int, int, int], Deque[LinkRecord]] = {}
+
+    @staticmethod
+    def _get_key(address: AddressBase) -> Tuple[int, int, int]:
+        return address.group, address.node, address.channel
+
+    def add(self, address: AddressBase, rssi: Union[float, None], attempts: int, crc_failures: int, timeouts: int):
+        record = LinkRecord(timestamp=time.time(), rssi=rssi, attempts=attempts,
+                            crc_failures=crc_failures, timeouts=timeouts)
+
+        with self.lock:
+            key = self._get_key(address)
+            if key not in self.records:
+                self.records[key] = collections.deque(maxlen=self.size)
+
+            self.records[key].append(record)
+
+    def get_records(self, address: AddressBase) -> List[LinkRecord]:
+        with self.lock:
+            return list(self.records.get(self._get_key(address), ()))
+
+    def get_addresses(self) -> List[AddressBase]:
+        with self.lock:
+            keys = list(self.records)
+
+        return [AddressBase(group=group, node=node, channel=channel) for group, node, channel in keys]
+
+    def get_rssi_percentile(self, address: AddressBase, p: float) -> Union[float, None]:
+        return percentile([r.rssi for r in self.get_records(address) if r.rssi is not None], p)
+
+    def get_rssi_trend(self, address: AddressBase) -> Union[float, None]:
+        return trend([(r.timestamp, r.rssi) for r in self.get_records(address) if r.rssi is not None])
+
+    def get_summary(self, address: AddressBase) -> LinkSummary:
+        records = self.get_records(address)
+        if not records:
+            return LinkSummary()
+
+        points = [(r.timestamp, r.rssi) for r in records if r.rssi is not None]
+        rssi = [y for _, y in points]
+
+        return LinkSummary(count=len(records),
+                           replies=len(rssi),
+                           rssi_p10=percentile(rssi, 10),
+                           rssi_p50=percentile(rssi, 50),
+                           rssi_p90=percentile(rssi, 90),
+                           rssi_trend=trend(points),
+                           mean_attempts=sum(r.attempts for r in records) / len(records),
+                           crc_failures=sum(r.crc_failures for r in records),
+                           timeouts=sum(r.timeouts for r in records),
+                           loss_rate=1 - len(rssi) / len(records))
+
+    def reset(self, address: Union[AddressBase, None] = None):
+        with self.lock:
+            if address is None:
+                self.records = {}
+                return
+
+            self.records.pop(self._get_key(address), None)
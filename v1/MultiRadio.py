@@ -0,0 +1,152 @@
+#!/usr/bin/python3.7
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Set, Type, Union
+from dataclasses import dataclass, field
+
+from _common.E22_UART import E22_UART
+
+from bsp.v1.Process import GatewayResponse, CommandJob
+from bsp.v1.Session import GatewaySession
+from bsp.v1.Transport import Transport
+from bsp.v1.Compact import CompactResponse
+
+from bsp.v1._generic import utils
+from bsp.v1._generic.interfaces import Command, Status, AddressBase, MetadataBase, ParameterBase
+
+
+@dataclass
+class RadioShard:
+    # one E22 module on its own serial port, E22_UART drives a single port so every
+    # module needs its own Transport; empty channels and groups take any address
+    name: str
+    transport: Union[Type[E22_UART], Transport]
+    channels: Set[int] = field(default_factory=set)
+    groups: Set[int] = field(default_factory=set)
+
+    session: GatewaySession = field(init=False, repr=False)
+    executor: ThreadPoolExecutor = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.channels = set(self.channels)
+        self.groups = set(self.groups)
+        self.session = GatewaySession(transport=self.transport)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="radio-" + self.name)
+
+
+class MultiRadioGateway():
+    # Several E22 modules serving the fleet in parallel. Commands go to the radio
+    # pinned to their group, then to the one pinned to their channel, otherwise to
+    # an unpinned radio chosen by channel so a channel always lands on the same
+    # module. Every radio runs its commands in its own worker thread and keeps its
+    # own session and base station state.
+
+    def __init__(self, shards: List[RadioShard]):
+        self.shards = shards
+
+        self.by_group: Dict[int, RadioShard] = {}
+        self.by_channel: Dict[int, RadioShard] = {}
+
+        for shard in shards:
+            for group in shard.groups:
+                self.by_group.setdefault(group, shard)
+
+            for channel in shard.channels:
+                self.by_channel.setdefault(channel, shard)
+
+        self.unpinned = [shard for shard in shards if not shard.groups and not shard.channels]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        for shard in self.shards:
+            shard.executor.submit(shard.session.close).result()
+            shard.executor.shutdown(wait=True)
+
+    def get_shard(self, address: AddressBase) -> Union[RadioShard, None]:
+        shard = self.by_group.get(address.group)
+        if shard is not None:
+            return shard
+
+        shard = self.by_channel.get(address.channel)
+        if shard is not None:
+            return shard
+
+        if not self.unpinned:
+            return None
+
+        return self.unpinned[address.channel % len(self.unpinned)]
+
+    def restart(self):
+        futures = [shard.executor.submit(shard.session.restart) for shard in self.shards]
+        for future in futures:
+            future.result()
+
+    def _submit(self, retries: int, timeout_ms: int, job: CommandJob,
+                compact: bool) -> Union[Future, GatewayResponse]:
+
+        shard = self.get_shard(job.address)
+        if shard is None:
+            status = Status(base_station=utils.ERROR_LORA_BASE_STATION)
+            gw_r = GatewayResponse(address=job.address, status=status)
+            return CompactResponse.from_response(gw_r) if compact else gw_r
+
+        return shard.executor.submit(shard.session.send_command,
+                                     retries=retries, timeout_ms=timeout_ms, hw_id=job.hw_id,
+                                     address=job.address,
+                                     command=job.command,
+                                     parameter=job.parameter,
+                                     matadata_received_dc=job.matadata_received_dc,
+                                     compact=compact)
+
+    def send_command(
+            self,
+            retries: int,
+            timeout_ms: int,
+            hw_id: int,
+            address: AddressBase,
+            command: Command,
+            parameter: ParameterBase,
+            matadata_received_dc: Union[Type[MetadataBase], MetadataBase],
+            compact: bool = False
+    ) -> Union[GatewayResponse, CompactResponse]:
+
+        job = CommandJob(hw_id=hw_id, address=address, command=command, parameter=parameter,
+                         matadata_received_dc=matadata_received_dc)
+
+        result = self._submit(retries, timeout_ms, job, compact)
+        return result.result() if isinstance(result, Future) else result
+
+    def send_commands(self, retries: int, timeout_ms: int, jobs: List[CommandJob],
+                      compact: bool = False, window: int = 1) -> List[Union[GatewayResponse, CompactResponse]]:
+
+        # jobs of each radio go as one batch so the radio groups them by base station
+        batches: Dict[str, List[int]] = {}
+        responses = [None] * len(jobs)
+
+        for i, job in enumerate(jobs):
+            shard = self.get_shard(job.address)
+            if shard is None:
+                responses[i] = self._submit(retries, timeout_ms, job, compact)
+                continue
+
+            batches.setdefault(shard.name, []).append(i)
+
+        futures = []
+        for shard in self.shards:
+            indexes = batches.get(shard.name)
+            if not indexes:
+                continue
+
+            future = shard.executor.submit(shard.session.send_commands, retries, timeout_ms,
+                                           [jobs[i] for i in indexes], compact, window)
+            futures.append((indexes, future))
+
+        for indexes, future in futures:
+            for i, gw_r in zip(indexes, future.result()):
+                responses[i] = gw_r
+
+        return responses
@@ -0,0 +1,228 @@
+#!/usr/bin/python3.7
+import datetime, heapq, logging, random, threading, time
+
+from typing import Dict, List, Tuple, Union
+from dataclasses import dataclass, field
+
+from bsp.v1.Process import Process, GatewayResponse, CommandJob
+from bsp.v1.Session import GatewaySession
+from bsp.v1.Compact import CompactResponse
+
+from bsp.v1.aireador import metadata_interfaces as AireadorMetadataInterfaces
+from bsp.v1.oxygenometro import metadata_interfaces as OxigenometroMetadataInterfaces
+
+from bsp.v1._generic import interfaces as GenericInterfaces
+
+
+AIREADOR = "aireador"
+OXIGENOMETRO = "oxigenometro"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PolledDevice:
+    hw_id: int
+    address: GenericInterfaces.AddressBase
+
+    kind: str = field(init=False)
+
+    def __post_init__(self):
+        version = Process._get_version(self.hw_id)
+
+        if version == Process.AireadorWhiteVersion or version == Process.AireadorBlackVersion:
+            self.kind = AIREADOR
+        else:
+            self.kind = OXIGENOMETRO
+
+    def get_key(self) -> Tuple[int, int, int]:
+        return self.address.group, self.address.node, self.address.channel
+
+    def get_job(self) -> CommandJob:
+        if self.kind == AIREADOR:
+            metadata_dc = AireadorMetadataInterfaces.ReadStatus
+        else:
+            metadata_dc = OxigenometroMetadataInterfaces.ReadStatus
+
+        return CommandJob(
+            hw_id=self.hw_id,
+            address=self.address,
+            command=GenericInterfaces.Commands.read_status,
+            parameter=GenericInterfaces.ParameterBase(),
+            matadata_received_dc=metadata_dc
+        )
+
+
+@dataclass
+class PolledStatus:
+    device: PolledDevice
+    response: Union[GatewayResponse, CompactResponse, None] = None
+    last_poll: Union[datetime.datetime, None] = None
+    last_ok: Union[datetime.datetime, None] = None
+    failures: int = 0
+    next_poll: float = field(repr=False, default=0.0)
+
+
+class FleetPoller():
+    # Keeps the read_status of every registered node up to date through a single
+    # GatewaySession; nodes due at the same time are served grouped by base station
+
+    def __init__(self,
+                 retries: int,
+                 timeout_ms: int,
+                 refresh_period_s: float = 60.0,
+                 intervals_s: Dict[str, float] = None,
+                 jitter: float = 0.1,
+                 session: GatewaySession = None,
+                 compact: bool = False):
+
+        self.retries = retries
+        self.timeout_ms = timeout_ms
+        self.refresh_period_s = refresh_period_s
+        self.intervals_s = dict(intervals_s) if intervals_s else {}
+        self.jitter = jitter
+        self.compact = compact
+
+        self.session = session if session is not None else GatewaySession()
+        # lock guards the status and schedule, radio_lock the session; a sweep only
+        # holds lock to pick the nodes due and to publish the responses
+        self.lock = threading.RLock()
+        self.radio_lock = threading.Lock()
+
+        self.status: Dict[Tuple[int, int, int], PolledStatus] = {}
+        self._heap: List[Tuple[float, int, Tuple[int, int, int]]] = []
+        self._sequence = 0
+
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _get_interval(self, device: PolledDevice) -> float:
+        interval = self.intervals_s.get(device.kind, self.refresh_period_s)
+
+        if self.jitter > 0:
+            interval *= 1 + random.uniform(-self.jitter, self.jitter)
+
+        return max(interval, 0.0)
+
+    def _schedule(self, key: Tuple[int, int, int], due: float):
+        self.status[key].next_poll = due
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, key))
+
+    def add_device(self, hw_id: int, group: int, node: int, channel: int) -> bool:
+        device = PolledDevice(hw_id=hw_id,
+                              address=GenericInterfaces.AddressBase(group=group, node=node, channel=channel))
+
+        if not device.address.valid or Process._get_version(hw_id) is None:
+            return False
+
+        with self.lock:
+            key = device.get_key()
+            self.status[key] = PolledStatus(device=device)
+
+            # spread the first sweep so that a large fleet does not start all at once
+            self._schedule(key, time.monotonic() + random.uniform(0, self.jitter * self._get_interval(device)))
+
+        self._wakeup.set()
+        return True
+
+    def remove_device(self, group: int, node: int, channel: int):
+        with self.lock:
+            self.status.pop((group, node, channel), None)
+
+    def get_status(self) -> Dict[Tuple[int, int, int], PolledStatus]:
+        with self.lock:
+            return dict(self.status)
+
+    def send_command(self, **kwargs) -> GatewayResponse:
+        # lets other users share the radio with the poller
+        with self.radio_lock:
+            return self.session.send_command(**kwargs)
+
+    def poll_once(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+
+            keys = []
+            while self._heap and self._heap[0][0] <= now:
+                due, _, key = heapq.heappop(self._heap)
+
+                # entries left behind by remove_device or add_device are discarded
+                if key in self.status and self.status[key].next_poll == due:
+                    keys.append(key)
+
+            devices = [self.status[key].device for key in keys]
+
+        # when the sweep raises its nodes count a failure and are polled on their next period
+        responses = [None] * len(keys)
+        try:
+            with self.radio_lock:
+                responses = self.session.send_commands(retries=self.retries, timeout_ms=self.timeout_ms,
+                                                       jobs=[device.get_job() for device in devices],
+                                                       compact=self.compact)
+        finally:
+            self._publish(keys, devices, responses)
+
+        with self.lock:
+            if not self._heap:
+                return self.refresh_period_s
+
+            return max(self._heap[0][0] - time.monotonic(), 0.0)
+
+    def _publish(self, keys: List[Tuple[int, int, int]], devices: List[PolledDevice],
+                 responses: List[Union[GatewayResponse, CompactResponse, None]]):
+
+        date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
+        now = time.monotonic()
+
+        with self.lock:
+            for key, device, gw_r in zip(keys, devices, responses):
+                polled = self.status.get(key)
+                # removed or added again while the sweep was on the radio
+                if polled is None or polled.device is not device:
+                    continue
+
+                polled.response = gw_r
+                polled.last_poll = date
+
+                if gw_r is not None and gw_r.is_response_ok():
+                    polled.last_ok = date
+                    polled.failures = 0
+                else:
+                    polled.failures += 1
+
+                self._schedule(key, now + self._get_interval(polled.device))
+
+    def run(self):
+        while not self._stop.is_set():
+            # cleared before the sweep, a wake() during it cuts the next wait short
+            self._wakeup.clear()
+
+            try:
+                wait_s = self.poll_once()
+            except Exception:
+                logger.exception("fleet poll failed")
+                wait_s = self.refresh_period_s
+
+            self._wakeup.wait(wait_s)
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="FleetPoller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+        with self.radio_lock:
+            self.session.close()
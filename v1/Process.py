@@ -1,16 +1,24 @@
 #!/usr/bin/python3.7
 import time, pprint, json, datetime
 
-from typing import Type, Union
+from typing import Dict, List, Tuple, Type, Union
 from dataclasses import dataclass, field
 
 from _common.E22_UART import E22_UART
 from _common.Config import Config
 
+from bsp.v1.Transport import Transport
+from bsp.v1.Compact import CompactResponse, compact_metadata_dc
+from bsp.v1.RttEstimator import RttEstimator, AUTO
+from bsp.v1.LinkQuality import LinkHistory
+from bsp.v1.ClockDrift import ClockDrift
+from bsp.v1.ResponseCache import ResponseCache
+
 from bsp.v1.aireador import interfaces as AireadorInterfaces
 from bsp.v1.oxygenometro import interfaces as OxigenometroInterfaces
 
 from bsp.v1._generic import utils
+from bsp.v1._generic.metrics import metrics
 from bsp.v1._generic.interfaces import Command, Status, AddressBase, DataSendBase, DataReceivedBase, \
     MetadataBase, ParameterBase, VersionBase
 
@@ -26,11 +34,48 @@ class GatewayResponse:
         return self.status.base_station == "OK" and self.status.node == "OK"
 
 
+@dataclass
+class CommandJob:
+    hw_id: int
+    address: AddressBase
+    command: Command
+    parameter: ParameterBase
+    matadata_received_dc: Union[Type[MetadataBase], MetadataBase] = MetadataBase
+
+
 class Process():
     AireadorBlackVersion = VersionBase(FW=1, HW=3)
     AireadorWhiteVersion = VersionBase(FW=1, HW=2)
     SotVersion = VersionBase(FW=1, HW=1)
 
+    # E22 broadcast address, a frame sent to it reaches every node of the channel
+    BROADCAST_ADDRESS = [0xFF, 0xFF]
+    GROUP_NODES = [1, 2, 3, 4, 5, 6, 7]
+
+    # commands harmless on the nodes of other groups, the rest need allow_foreign_groups
+    BROADCAST_COMMANDS = ["SEND_SYNC_TIME"]
+
+    # commands whose date the node takes as its clock
+    CLOCK_COMMANDS = ["SEND_SYNC_TIME", "SEND_RUN_TIMER_MODE", "SEND_RUN_STANDALONE_MODE", "SEND_RUN_OXYGEN_MODE"]
+
+    # radio driver, E22_UART or anything else implementing Transport
+    transport: Union[Type[E22_UART], Transport] = E22_UART
+
+    # [addh, addl, channel] currently loaded in the E22, None when unknown
+    radio_state: Union[List[int], None] = None
+
+    # per node round trip times, used when retries or timeout_ms are AUTO
+    rtt_estimator = RttEstimator()
+
+    # per node rssi, attempts, crc failures and timeouts of the last commands
+    link_history = LinkHistory()
+
+    # per node clock offset and drift measured from the timestamps of the replies
+    clock_drift = ClockDrift()
+
+    # responses of the commands with execution id that already ran
+    response_cache = ResponseCache()
+
     @staticmethod
     def _get_version(hw_id: int) -> Union[VersionBase, None]:
         if Process.AireadorBlackVersion.HW == hw_id:
@@ -44,36 +89,62 @@ class Process():
 
         return None
 
+    @staticmethod
+    def invalidate_radio_state():
+        Process.radio_state = None
+
+    @staticmethod
+    def set_transport(transport: Union[Type[E22_UART], Transport]):
+        Process.transport = transport
+        Process.invalidate_radio_state()
+
     @staticmethod
     def _check_addh_channel(address: AddressBase) -> bool:
-        serial_o = E22_UART.set_mode_command_settings()
+        bs_add = address.get_base_station_address_channel()
+
+        if Process.radio_state == bs_add:
+            return True
+
+        Process.invalidate_radio_state()
+
+        if not Process._load_base_station(Process.transport, bs_add):
+            return False
+
+        Process.radio_state = bs_add
+        return True
+
+    @staticmethod
+    def _load_base_station(transport: Union[Type[E22_UART], Transport], bs_add: List[int]) -> bool:
+        # reads the E22 registers and rewrites them when address or channel differ
+        with metrics.span("mode_command_settings"):
+            serial_o = transport.set_mode_command_settings()
 
         retry = 4
         while retry > 0:
             retry -= 1
 
-            parameters = E22_UART.get_operating_parameters(serial_o)
+            with metrics.span("get_operating_parameters"):
+                parameters = transport.get_operating_parameters(serial_o)
 
             if Config.debug_lora_parameters:
                 print("Loading lora, parameters: " + '[{}]'.format(', '.join(hex(x) for x in parameters)))
 
             if len(parameters) != 12:
-                time.sleep(2)
+                with metrics.span("sleep"):
+                    time.sleep(2)
                 continue
 
             e22_reg = parameters[3:]
 
             if Config.debug_lora_parameters:
-                E22_UART.print(e22_reg)
+                transport.print(e22_reg)
 
             # getting channel
-            my_channel = e22_reg[E22_UART.E22_REG_OFFSET_REG2]
+            my_channel = e22_reg[transport.E22_REG_OFFSET_REG2]
 
             # getting address
-            my_addh = e22_reg[E22_UART.E22_REG_OFFSET_ADDH]
-            my_addl = e22_reg[E22_UART.E22_REG_OFFSET_ADDL]
-
-            bs_add = address.get_base_station_address_channel()
+            my_addh = e22_reg[transport.E22_REG_OFFSET_ADDH]
+            my_addl = e22_reg[transport.E22_REG_OFFSET_ADDL]
 
             if my_addh == bs_add[0] and my_addl == bs_add[1] and my_channel == bs_add[2]:
                 serial_o.close()
@@ -81,9 +152,13 @@ class Process():
 
             # buffer with rssi information 0xD3
             buffer = [bs_add[0], bs_add[1], 0x00, 0xe2, 0x00, bs_add[2], 0xD3, 0x01, 0x01]
-            if not E22_UART.write_registers(serial_o, 0x00, 9, buffer, save_option=False):
+            with metrics.span("write_registers"):
+                written = transport.write_registers(serial_o, 0x00, 9, buffer, save_option=False)
+
+            if not written:
                 serial_o.close()
-                time.sleep(3)
+                with metrics.span("sleep"):
+                    time.sleep(3)
                 continue
 
             serial_o.close()
@@ -93,15 +168,8 @@ class Process():
         return False
 
     @staticmethod
-    def send_command(
-            retries: int,
-            timeout_ms: int,
-            hw_id: int,
-            address: AddressBase,
-            command: Command,
-            parameter: ParameterBase,
-            matadata_received_dc: Union[Type[MetadataBase], MetadataBase]
-    ) -> GatewayResponse:
+    def _create_data_send(hw_id: int, address: AddressBase, command: Command,
+                          parameter: ParameterBase) -> Union[DataSendBase, GatewayResponse]:
 
         #------------------------------------------
         # check address
@@ -133,33 +201,75 @@ class Process():
             parameter=parameter
         )
 
-        #-------------------------------------------
-        # reconfigure base station to get local addres of group
-        if not Process._check_addh_channel(address):
-            status = Status(base_station=utils.ERROR_LORA_BASE_STATION)
-            gw_r = GatewayResponse(address=address, status=status, data_sent=data_send)
-            return gw_r
+        return data_send
 
-        # -------------------------------------------
-        # prepare to comunicate
-        serial_o = E22_UART.set_mode_transparent_transmition()
+    @staticmethod
+    def _create_data_received(response: List[int], data_send: DataSendBase, command: Command,
+                              matadata_received_dc: Union[Type[MetadataBase], MetadataBase]) -> DataReceivedBase:
+
+        version = data_send.version
+
+        if version == Process.AireadorWhiteVersion or version == Process.AireadorBlackVersion:
+            data_received = AireadorInterfaces.DataReceived(stream=response,
+                                                            address=data_send.address,
+                                                            version_p=version,
+                                                            command_p=command.command_received,
+                                                            parameter_p=data_send.parameter,
+                                                            metadata_dc=matadata_received_dc)
+        else:
+            data_received = OxigenometroInterfaces.DataReceived(stream=response,
+                                                                address=data_send.address,
+                                                                version_p=version,
+                                                                command_p=command.command_received,
+                                                                parameter_p=data_send.parameter,
+                                                                metadata_dc=matadata_received_dc)
+
+        Process.clock_drift.add_received(data_send.address, data_received)
+
+        return data_received
+
+    @staticmethod
+    def _transmit(serial_o, retries: Union[int, str], timeout_ms: Union[int, str], data_send: DataSendBase,
+                  command: Command, matadata_received_dc: Union[Type[MetadataBase], MetadataBase],
+                  transport: Union[Type[E22_UART], Transport, None] = None) -> GatewayResponse:
+
+        address = data_send.address
+        transport = transport if transport is not None else Process.transport
+        estimator = Process.rtt_estimator
+
+        if retries == AUTO:
+            retries = estimator.get_retries(address)
+
+        timeouts = 0
+        crc_failures = 0
 
         retry = retries
         while retry > 0:
-            raw = data_send.get_raw()
+            raw = data_send.get_raw_bytes()
 
             if len(raw) > 240:
                 status = Status(base_station=utils.ERROR_BUFFER_TX_OVERFLOW)
                 gw_r = GatewayResponse(address=address, status=status, data_sent=data_send)
                 return gw_r
 
-            E22_UART.safe_send(serial_o, raw)
-            response = E22_UART.receive_data(serial_o, timeout_ms)
+            if timeout_ms == AUTO:
+                attempt_timeout_ms = estimator.get_timeout_ms(address, retries - retry)
+            else:
+                attempt_timeout_ms = timeout_ms
+
+            start = time.monotonic()
+            with metrics.span("safe_send"):
+                transport.safe_send(serial_o, raw)
+            with metrics.span("receive_data"):
+                response = transport.receive_data(serial_o, attempt_timeout_ms)
+            rtt_ms = (time.monotonic() - start) * 1000
 
             if not response:
+                timeouts += 1
                 retry -= 1
                 if retry == 0:
-                    serial_o.close()
+                    estimator.add_result(address, replied=False)
+                    Process.link_history.add(address, None, retries - retry, crc_failures, timeouts)
                     status = Status(base_station=utils.ERROR_LORA_NETWORK, attempts=(retries - retry))
                     gw_r = GatewayResponse(address=address, status=status, data_sent=data_send)
                     return gw_r
@@ -167,35 +277,515 @@ class Process():
 
             # ------------------------------------------
             # creating data receive package
-            if version == Process.AireadorWhiteVersion or version == Process.AireadorBlackVersion:
-                data_received = AireadorInterfaces.DataReceived(stream=response,
-                                                                address=address,
-                                                                version_p=version,
-                                                                command_p=command.command_received,
-                                                                parameter_p=parameter,
-                                                                metadata_dc=matadata_received_dc)
-            else:
-                data_received = OxigenometroInterfaces.DataReceived(stream=response,
-                                                                    address=address,
-                                                                    version_p=version,
-                                                                    command_p=command.command_received,
-                                                                    parameter_p=parameter,
-                                                                    metadata_dc=matadata_received_dc)
-
-
+            with metrics.span("create_data_received"):
+                data_received = Process._create_data_received(response, data_send, command, matadata_received_dc)
 
             if data_received.status == utils.ERROR_CRC_RECEIVED:
+                crc_failures += 1
                 retry -= 1
                 if retry == 0:
-                    serial_o.close()
+                    estimator.add_result(address, replied=True)
+                    Process.link_history.add(address, None, retries - retry, crc_failures, timeouts)
                     status = Status(base_station=utils.ERROR_CRC_RECEIVED, attempts=(retries - retry))
                     gw_r = GatewayResponse(address=address, status=status, data_sent=data_send)
                     return gw_r
                 continue
 
-            status = Status(base_station=utils.OK, node=data_received.status, attempts=(retries - retry))
+            # after a retransmission the reply may belong to an earlier attempt (Karn)
+            if retry == retries:
+                estimator.add_sample(address, rtt_ms)
+            estimator.add_result(address, replied=True)
+            Process.link_history.add(address, data_received.rssi, retries - retry, crc_failures, timeouts)
 
-            serial_o.close()
+            status = Status(base_station=utils.OK, node=data_received.status, attempts=(retries - retry))
 
             gw_r = GatewayResponse(address=address, status=status, data_sent=data_send, data_received=data_received)
             return gw_r
+
+    @staticmethod
+    def _get_cached(address: AddressBase, command: Command,
+                    parameter: ParameterBase) -> Union[GatewayResponse, None]:
+        execution_id = getattr(parameter, "execution_id", 0)
+        if not execution_id:
+            return None
+
+        return Process.response_cache.get(address, command, execution_id, parameter.get_key_bytes())
+
+    @staticmethod
+    def _add_cached(gw_r: GatewayResponse, command: Command):
+        parameter = gw_r.data_sent.parameter
+        execution_id = getattr(parameter, "execution_id", 0)
+        if execution_id and gw_r.is_response_ok():
+            Process.response_cache.add(gw_r.address, command, execution_id, parameter.get_key_bytes(), gw_r)
+
+    @staticmethod
+    def _transmit_once(serial_o, retries: Union[int, str], timeout_ms: Union[int, str], data_send: DataSendBase,
+                       command: Command, matadata_received_dc: Union[Type[MetadataBase], MetadataBase],
+                       transport: Union[Type[E22_UART], Transport, None] = None) -> GatewayResponse:
+
+        # _transmit plus the cache of the commands with execution id. Nothing extra is
+        # sent when every reply was lost: the retries of _transmit already resend the
+        # command, and a node that ran an earlier attempt answers ERROR_APP_RUNNING
+        # with its date, which is taken as OK.
+        gw_r = Process._transmit(serial_o, retries, timeout_ms, data_send, command, matadata_received_dc,
+                                 transport=transport)
+
+        return Process._finish_transmit(gw_r, command)
+
+    @staticmethod
+    def _finish_transmit(gw_r: GatewayResponse, command: Command) -> GatewayResponse:
+
+        # bookkeeping of a command once its exchange ended, shared by _transmit_once and
+        # every slot of _transmit_window and _transmit_broadcast
+        if gw_r.is_response_ok() and command.command_send.name in Process.CLOCK_COMMANDS:
+            # node clock was set to the gateway clock, offsets measured before no longer apply
+            Process.clock_drift.add_sync(gw_r.address)
+
+        Process._add_cached(gw_r, command)
+
+        return gw_r
+
+    @staticmethod
+    def _transmit_window(serial_o, retries: Union[int, str], timeout_ms: Union[int, str], window: int,
+                         requests: List[Tuple[DataSendBase, Command, Union[Type[MetadataBase], MetadataBase]]],
+                         transport: Union[Type[E22_UART], Transport, None] = None) -> List[GatewayResponse]:
+
+        # Nodes of one base station are sent up to window frames back to back, with at
+        # most one frame per node in flight; replies are matched by the node address
+        # and command code and only the requests left unanswered are sent again.
+        # Every slot gets the metrics, rtt samples and execution id bookkeeping of a
+        # single command.
+        transport = transport if transport is not None else Process.transport
+        estimator = Process.rtt_estimator
+
+        size = len(requests)
+        responses: List[Union[GatewayResponse, None]] = [None] * size
+        # first send of every slot for its total, last send for its rtt
+        started = [0.0] * size
+        sent_at = [0.0] * size
+        elapsed_ms = [0.0] * size
+        attempts = [0] * size
+        timeouts = [0] * size
+        crc_failures = [0] * size
+        max_attempts = [estimator.get_retries(data_send.address) if retries == AUTO else retries
+                        for data_send, _, _ in requests]
+
+        waiting = list(range(size))
+        while waiting:
+            in_flight: Dict[Tuple[int, int], int] = {}
+            for i in waiting:
+                address = requests[i][0].address
+                if len(in_flight) < window and (address.addh, address.addl) not in in_flight:
+                    in_flight[(address.addh, address.addl)] = i
+
+            for key, i in list(in_flight.items()):
+                data_send, command, _ = requests[i]
+                raw = data_send.get_raw_bytes()
+
+                sent_at[i] = time.monotonic()
+                if not attempts[i]:
+                    started[i] = sent_at[i]
+
+                if len(raw) > 240:
+                    status = Status(base_station=utils.ERROR_BUFFER_TX_OVERFLOW)
+                    responses[i] = GatewayResponse(address=data_send.address, status=status, data_sent=data_send)
+                    del in_flight[key]
+                    continue
+
+                with metrics.label(command.command_send.name, data_send.address):
+                    with metrics.span("safe_send"):
+                        transport.safe_send(serial_o, raw)
+
+            if timeout_ms == AUTO:
+                window_timeout_ms = max([estimator.get_timeout_ms(requests[i][0].address, attempts[i])
+                                         for i in in_flight.values()],
+                                        default=0)
+            else:
+                window_timeout_ms = timeout_ms
+
+            last_crc_failure = set()
+            deadline = time.monotonic() + window_timeout_ms / 1000
+
+            while in_flight:
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    break
+
+                with metrics.span("receive_data"):
+                    response = transport.receive_data(serial_o, remaining_ms)
+
+                if not response:
+                    break
+
+                i = in_flight.get((response[2], response[3])) if len(response) > 3 else None
+                if i is None:
+                    continue
+
+                received_at = time.monotonic()
+
+                data_send, command, matadata_received_dc = requests[i]
+                with metrics.label(command.command_send.name, data_send.address):
+                    with metrics.span("create_data_received"):
+                        data_received = Process._create_data_received(response, data_send, command,
+                                                                      matadata_received_dc)
+
+                if data_received.status == utils.ERROR_CRC_RECEIVED:
+                    crc_failures[i] += 1
+                    last_crc_failure.add(i)
+                    continue
+
+                # late reply to another command of the same node
+                if data_received.status == utils.ERROR_UNKNOWN_RECEIVED_COMMAND:
+                    continue
+
+                del in_flight[(response[2], response[3])]
+                last_crc_failure.discard(i)
+                elapsed_ms[i] = (received_at - started[i]) * 1000
+
+                # after a retransmission the reply may belong to an earlier attempt (Karn)
+                if not attempts[i]:
+                    estimator.add_sample(data_send.address, (received_at - sent_at[i]) * 1000)
+                estimator.add_result(data_send.address, replied=True)
+                Process.link_history.add(data_send.address, data_received.rssi, attempts[i], crc_failures[i],
+                                         timeouts[i])
+
+                status = Status(base_station=utils.OK, node=data_received.status, attempts=attempts[i])
+                responses[i] = GatewayResponse(address=data_send.address, status=status, data_sent=data_send,
+                                               data_received=data_received)
+
+            for i in in_flight.values():
+                data_send = requests[i][0]
+                attempts[i] += 1
+
+                if i not in last_crc_failure:
+                    timeouts[i] += 1
+
+                if attempts[i] < max_attempts[i]:
+                    continue
+
+                elapsed_ms[i] = (time.monotonic() - started[i]) * 1000
+
+                replied = i in last_crc_failure
+                estimator.add_result(data_send.address, replied=replied)
+                Process.link_history.add(data_send.address, None, attempts[i], crc_failures[i], timeouts[i])
+
+                base_station = utils.ERROR_CRC_RECEIVED if replied else utils.ERROR_LORA_NETWORK
+                status = Status(base_station=base_station, attempts=attempts[i])
+                responses[i] = GatewayResponse(address=data_send.address, status=status, data_sent=data_send)
+
+            waiting = [i for i in waiting if responses[i] is None]
+
+        for i, gw_r in enumerate(responses):
+            data_send, command, _ = requests[i]
+            responses[i] = Process._finish_transmit(gw_r, command)
+            metrics.add_command(command.command_send.name, data_send.address, elapsed_ms[i])
+
+        return responses
+
+    @staticmethod
+    def _transmit_broadcast(serial_o, retries: Union[int, str], timeout_ms: Union[int, str],
+                            requests: List[Tuple[DataSendBase, Command, Union[Type[MetadataBase], MetadataBase]]],
+                            transport: Union[Type[E22_UART], Transport, None] = None) -> List[GatewayResponse]:
+
+        # One frame to the broadcast address, the replies heard within timeout_ms are
+        # matched to the requests by node address; silent nodes and corrupted replies
+        # get the usual unicast exchange afterwards.
+        transport = transport if transport is not None else Process.transport
+        estimator = Process.rtt_estimator
+
+        responses: List[Union[GatewayResponse, None]] = [None] * len(requests)
+        pending = {(data_send.address.addh, data_send.address.addl): i
+                   for i, (data_send, _, _) in enumerate(requests)}
+
+        # crc only covers the payload, the address prefix can be swapped
+        raw = requests[0][0].get_raw_bytes()
+        if len(raw) <= 240:
+            with metrics.span("safe_send"):
+                transport.safe_send(serial_o, bytes(Process.BROADCAST_ADDRESS) + raw[2:])
+
+            if timeout_ms == AUTO:
+                window_timeout_ms = max(estimator.get_timeout_ms(data_send.address) for data_send, _, _ in requests)
+            else:
+                window_timeout_ms = timeout_ms
+
+            deadline = time.monotonic() + window_timeout_ms / 1000
+
+            while pending:
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    break
+
+                with metrics.span("receive_data"):
+                    response = transport.receive_data(serial_o, remaining_ms)
+
+                if not response:
+                    break
+
+                # nodes of other groups on the channel answer too
+                i = pending.get((response[2], response[3])) if len(response) > 3 else None
+                if i is None:
+                    continue
+
+                data_send, command, matadata_received_dc = requests[i]
+                with metrics.span("create_data_received"):
+                    data_received = Process._create_data_received(response, data_send, command, matadata_received_dc)
+
+                if data_received.status in (utils.ERROR_CRC_RECEIVED, utils.ERROR_UNKNOWN_RECEIVED_COMMAND):
+                    continue
+
+                del pending[(response[2], response[3])]
+
+                estimator.add_result(data_send.address, replied=True)
+                Process.link_history.add(data_send.address, data_received.rssi, 0, 0, 0)
+
+                status = Status(base_station=utils.OK, node=data_received.status, attempts=0)
+                responses[i] = GatewayResponse(address=data_send.address, status=status, data_sent=data_send,
+                                               data_received=data_received)
+
+        for i in pending.values():
+            data_send, command, matadata_received_dc = requests[i]
+            responses[i] = Process._transmit(serial_o, retries, timeout_ms, data_send, command, matadata_received_dc,
+                                             transport=transport)
+
+        for i, gw_r in enumerate(responses):
+            responses[i] = Process._finish_transmit(gw_r, requests[i][1])
+
+        return responses
+
+    @staticmethod
+    def send_command(
+            retries: Union[int, str],
+            timeout_ms: Union[int, str],
+            hw_id: int,
+            address: AddressBase,
+            command: Command,
+            parameter: ParameterBase,
+            matadata_received_dc: Union[Type[MetadataBase], MetadataBase],
+            compact: bool = False
+    ) -> Union[GatewayResponse, CompactResponse]:
+
+        # the full response is built and then reduced, see CompactResponse
+        if compact:
+            gw_r = Process.send_command(retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+                                        address=address,
+                                        command=command,
+                                        parameter=parameter,
+                                        matadata_received_dc=compact_metadata_dc(matadata_received_dc))
+
+            return CompactResponse.from_response(gw_r)
+
+        with metrics.command(command.command_send.name, address):
+            return Process._send_command(retries, timeout_ms, hw_id, address, command, parameter,
+                                         matadata_received_dc)
+
+    @staticmethod
+    def _send_command(
+            retries: Union[int, str],
+            timeout_ms: Union[int, str],
+            hw_id: int,
+            address: AddressBase,
+            command: Command,
+            parameter: ParameterBase,
+            matadata_received_dc: Union[Type[MetadataBase], MetadataBase]
+    ) -> GatewayResponse:
+
+        data_send = Process._create_data_send(hw_id, address, command, parameter)
+        if isinstance(data_send, GatewayResponse):
+            return data_send
+
+        gw_r = Process._get_cached(address, command, parameter)
+        if gw_r is not None:
+            return gw_r
+
+        #-------------------------------------------
+        # reconfigure base station to get local addres of group
+        with metrics.span("check_addh_channel"):
+            radio_ready = Process._check_addh_channel(address)
+
+        if not radio_ready:
+            status = Status(base_station=utils.ERROR_LORA_BASE_STATION)
+            gw_r = GatewayResponse(address=address, status=status, data_sent=data_send)
+            return gw_r
+
+        # -------------------------------------------
+        # prepare to comunicate
+        with metrics.span("mode_transparent"):
+            serial_o = Process.transport.set_mode_transparent_transmition()
+
+        gw_r = Process._transmit_once(serial_o, retries, timeout_ms, data_send, command, matadata_received_dc)
+
+        with metrics.span("serial_close"):
+            serial_o.close()
+
+        return gw_r
+
+    @staticmethod
+    def _get_schedule(jobs: List[CommandJob], radio_state: Union[List[int], None] = None) -> List[int]:
+        # group jobs by base station address and channel, starting with the one already
+        # loaded in the E22 (Process.radio_state unless given); original order is kept
+        # inside each group
+        current = radio_state if radio_state is not None else Process.radio_state
+
+        def key(i: int):
+            bs_add = jobs[i].address.get_base_station_address_channel()
+            return bs_add != current, bs_add
+
+        return sorted(range(len(jobs)), key=key)
+
+    @staticmethod
+    def _get_batches(jobs: List[CommandJob], radio_state: Union[List[int], None] = None) -> List[List[int]]:
+        # schedule split in runs of jobs sharing base station address and channel
+        batches = []
+        last = None
+
+        for i in Process._get_schedule(jobs, radio_state):
+            bs_add = jobs[i].address.get_base_station_address_channel()
+            if bs_add != last:
+                batches.append([])
+                last = bs_add
+
+            batches[-1].append(i)
+
+        return batches
+
+    @staticmethod
+    def _prepare_window(jobs: List[CommandJob], indexes: List[int], compact: bool,
+                        responses: List[Union[GatewayResponse, None]]
+                        ) -> List[Tuple[int, Tuple[DataSendBase, Command, Union[Type[MetadataBase], MetadataBase]]]]:
+        # requests of a batch for _transmit_window, jobs failing before the radio get
+        # their response right away
+        requests = []
+
+        for i in indexes:
+            job = jobs[i]
+            data_send = Process._create_data_send(job.hw_id, job.address, job.command, job.parameter)
+            if isinstance(data_send, GatewayResponse):
+                responses[i] = CompactResponse.from_response(data_send) if compact else data_send
+                continue
+
+            gw_r = Process._get_cached(job.address, job.command, job.parameter)
+            if gw_r is not None:
+                responses[i] = CompactResponse.from_response(gw_r) if compact else gw_r
+                continue
+
+            metadata_dc = compact_metadata_dc(job.matadata_received_dc) if compact else job.matadata_received_dc
+            requests.append((i, (data_send, job.command, metadata_dc)))
+
+        return requests
+
+    @staticmethod
+    def _finish_window(requests: list, gw_r_lst: List[GatewayResponse], compact: bool,
+                       responses: List[Union[GatewayResponse, CompactResponse, None]]):
+        for (i, _), gw_r in zip(requests, gw_r_lst):
+            responses[i] = CompactResponse.from_response(gw_r) if compact else gw_r
+
+    @staticmethod
+    def _fail_window(requests: list, compact: bool, responses: List[Union[GatewayResponse, CompactResponse, None]],
+                     base_station: str = utils.ERROR_LORA_BASE_STATION):
+        status = Status(base_station=base_station)
+        gw_r_lst = [GatewayResponse(address=data_send.address, status=status, data_sent=data_send)
+                    for _, (data_send, _, _) in requests]
+        Process._finish_window(requests, gw_r_lst, compact, responses)
+
+    @staticmethod
+    def send_commands(retries: Union[int, str], timeout_ms: Union[int, str], jobs: List[CommandJob],
+                      compact: bool = False, window: int = 1) -> List[Union[GatewayResponse, CompactResponse]]:
+        responses = [None] * len(jobs)
+
+        if window > 1:
+            for indexes in Process._get_batches(jobs):
+                requests = Process._prepare_window(jobs, indexes, compact, responses)
+                if not requests:
+                    continue
+
+                with metrics.span("check_addh_channel"):
+                    radio_ready = Process._check_addh_channel(jobs[requests[0][0]].address)
+
+                if not radio_ready:
+                    Process._fail_window(requests, compact, responses)
+                    continue
+
+                with metrics.span("mode_transparent"):
+                    serial_o = Process.transport.set_mode_transparent_transmition()
+
+                gw_r_lst = Process._transmit_window(serial_o, retries, timeout_ms, window,
+                                                    [request for _, request in requests])
+
+                with metrics.span("serial_close"):
+                    serial_o.close()
+
+                Process._finish_window(requests, gw_r_lst, compact, responses)
+
+            return responses
+
+        for i in Process._get_schedule(jobs):
+            job = jobs[i]
+            responses[i] = Process.send_command(
+                retries=retries, timeout_ms=timeout_ms, hw_id=job.hw_id,
+                address=job.address,
+                command=job.command,
+                parameter=job.parameter,
+                matadata_received_dc=job.matadata_received_dc,
+                compact=compact
+            )
+
+        return responses
+
+    @staticmethod
+    def send_group(
+            retries: Union[int, str],
+            timeout_ms: Union[int, str],
+            hw_id: int,
+            group: int,
+            channel: int,
+            nodes: List[int],
+            command: Command,
+            parameter: ParameterBase,
+            matadata_received_dc: Union[Type[MetadataBase], MetadataBase],
+            broadcast: bool = False,
+            compact: bool = False,
+            allow_foreign_groups: bool = False
+    ) -> List[Union[GatewayResponse, CompactResponse]]:
+
+        # Same command to several nodes of a group. Without broadcast the frames go in
+        # one window of unicasts; with it a single frame goes to the broadcast address,
+        # which every node of the channel executes, including other groups. So only
+        # BROADCAST_COMMANDS are broadcast unless allow_foreign_groups is set, the
+        # rest fail with ERROR_WRONG_PARAMETERS before reaching the radio.
+        jobs = [CommandJob(hw_id=hw_id, address=AddressBase(group=group, node=node, channel=channel),
+                           command=command, parameter=parameter, matadata_received_dc=matadata_received_dc)
+                for node in nodes]
+
+        if not broadcast:
+            return Process.send_commands(retries, timeout_ms, jobs, compact=compact, window=len(jobs))
+
+        responses = [None] * len(jobs)
+        requests = Process._prepare_window(jobs, list(range(len(jobs))), compact, responses)
+        if not requests:
+            return responses
+
+        if command.command_send.name not in Process.BROADCAST_COMMANDS and not allow_foreign_groups:
+            Process._fail_window(requests, compact, responses, base_station=utils.ERROR_WRONG_PARAMETERS)
+            return responses
+
+        address = requests[0][1][0].address
+
+        with metrics.command(command.command_send.name, address):
+            with metrics.span("check_addh_channel"):
+                radio_ready = Process._check_addh_channel(address)
+
+            if not radio_ready:
+                Process._fail_window(requests, compact, responses)
+                return responses
+
+            with metrics.span("mode_transparent"):
+                serial_o = Process.transport.set_mode_transparent_transmition()
+
+            gw_r_lst = Process._transmit_broadcast(serial_o, retries, timeout_ms, [request for _, request in requests])
+
+            with metrics.span("serial_close"):
+                serial_o.close()
+
+        Process._finish_window(requests, gw_r_lst, compact, responses)
+
+        return responses
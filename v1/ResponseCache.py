@@ -0,0 +1,49 @@
+#!/usr/bin/python3.7
+import collections, threading
+
+from typing import Any, Tuple, Union
+
+from bsp.v1._generic.interfaces import AddressBase, Command
+
+
+class ResponseCache():
+    # Last successful responses of state-changing commands, keyed by node, command,
+    # execution id and encoded parameters without the date. A command sent again with
+    # the same id and parameters already ran on the node, so it is answered from here
+    # instead of being executed twice.
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+        self.lock = threading.Lock()
+        # least recently used first
+        self.responses = collections.OrderedDict()
+
+    @staticmethod
+    def _get_key(address: AddressBase, command: Command, execution_id: int,
+                 parameter_raw: bytes) -> Tuple[int, int, int, int, int, bytes]:
+        return address.group, address.node, address.channel, command.command_send.code, execution_id, parameter_raw
+
+    def get(self, address: AddressBase, command: Command, execution_id: int, parameter_raw: bytes) -> Union[Any, None]:
+        key = self._get_key(address, command, execution_id, parameter_raw)
+
+        with self.lock:
+            response = self.responses.get(key)
+            if response is not None:
+                self.responses.move_to_end(key)
+
+            return response
+
+    def add(self, address: AddressBase, command: Command, execution_id: int, parameter_raw: bytes, response: Any):
+        key = self._get_key(address, command, execution_id, parameter_raw)
+
+        with self.lock:
+            self.responses[key] = response
+            self.responses.move_to_end(key)
+
+            while len(self.responses) > self.size:
+                self.responses.popitem(last=False)
+
+    def reset(self):
+        with self.lock:
+            self.responses = collections.OrderedDict()
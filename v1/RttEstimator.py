@@ -0,0 +1,121 @@
+#!/usr/bin/python3.7
+import threading
+
+from typing import Dict, Tuple, Union
+from dataclasses import dataclass
+
+from bsp.v1._generic.interfaces import AddressBase
+
+# retries and/or timeout_ms value that lets the estimator choose them per node
+AUTO = "auto"
+
+
+@dataclass
+class RttEstimate:
+    srtt_ms: Union[float, None] = None
+    rttvar_ms: Union[float, None] = None
+    rto_ms: Union[float, None] = None
+    samples: int = 0
+    # consecutive commands without any reply
+    failures: int = 0
+
+
+class RttEstimator():
+    # Round trip time estimation per node in the TCP retransmission timer style
+    # (RFC 6298): smoothed rtt and rtt variance updated with the replies received
+    # on the first attempt, timeout doubled on every lost attempt of one command.
+    # Nodes that stop answering get fewer retries and no backoff so they do not
+    # burn the whole budget every sweep.
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self,
+                 initial_timeout_ms: int = 3000,
+                 min_timeout_ms: int = 300,
+                 max_timeout_ms: int = 10000,
+                 max_retries: int = 3,
+                 dead_after: int = 3):
+
+        self.initial_timeout_ms = initial_timeout_ms
+        self.min_timeout_ms = min_timeout_ms
+        self.max_timeout_ms = max_timeout_ms
+        self.max_retries = max_retries
+        self.dead_after = dead_after
+
+        self.lock = threading.Lock()
+        self.estimates: Dict[Tuple[int, int, int], RttEstimate] = {}
+
+    @staticmethod
+    def _get_key(address: AddressBase) -> Tuple[int, int, int]:
+        return address.group, address.node, address.channel
+
+    def _get(self, address: AddressBase) -> RttEstimate:
+        key = self._get_key(address)
+
+        estimate = self.estimates.get(key)
+        if estimate is None:
+            estimate = RttEstimate()
+            self.estimates[key] = estimate
+
+        return estimate
+
+    def _clamp(self, timeout_ms: float) -> float:
+        return min(max(timeout_ms, self.min_timeout_ms), self.max_timeout_ms)
+
+    def add_sample(self, address: AddressBase, rtt_ms: float):
+        with self.lock:
+            estimate = self._get(address)
+
+            if estimate.srtt_ms is None:
+                estimate.srtt_ms = rtt_ms
+                estimate.rttvar_ms = rtt_ms / 2
+            else:
+                estimate.rttvar_ms += self.BETA * (abs(estimate.srtt_ms - rtt_ms) - estimate.rttvar_ms)
+                estimate.srtt_ms += self.ALPHA * (rtt_ms - estimate.srtt_ms)
+
+            estimate.rto_ms = self._clamp(estimate.srtt_ms + self.K * estimate.rttvar_ms)
+            estimate.samples += 1
+
+    def add_result(self, address: AddressBase, replied: bool):
+        with self.lock:
+            estimate = self._get(address)
+            estimate.failures = 0 if replied else estimate.failures + 1
+
+    def get_timeout_ms(self, address: AddressBase, attempt: int = 0) -> int:
+        # attempt counts the lost attempts of the current command, the backoff does not
+        # outlive the command
+        with self.lock:
+            estimate = self._get(address)
+            rto_ms = estimate.rto_ms if estimate.rto_ms is not None else self.initial_timeout_ms
+            failures = estimate.failures
+
+        if failures >= self.dead_after:
+            return int(round(min(rto_ms, self.initial_timeout_ms)))
+
+        return int(round(self._clamp(rto_ms * 2 ** attempt)))
+
+    def get_retries(self, address: AddressBase) -> int:
+        with self.lock:
+            failures = self._get(address).failures
+
+        # dead nodes are only probed once per command until they answer again
+        if failures >= self.dead_after:
+            return 1
+
+        return max(self.max_retries - failures, 1)
+
+    def get_estimate(self, address: AddressBase) -> RttEstimate:
+        with self.lock:
+            estimate = self._get(address)
+            return RttEstimate(srtt_ms=estimate.srtt_ms, rttvar_ms=estimate.rttvar_ms, rto_ms=estimate.rto_ms,
+                               samples=estimate.samples, failures=estimate.failures)
+
+    def reset(self, address: Union[AddressBase, None] = None):
+        with self.lock:
+            if address is None:
+                self.estimates = {}
+                return
+
+            self.estimates.pop(self._get_key(address), None)
@@ -0,0 +1,273 @@
+#!/usr/bin/python3.7
+import bisect, datetime, mmap, os, struct, threading
+
+from typing import Dict, List, Union
+
+from bsp.v1.oxygenometro.metadata_interfaces import Sample, SampleColumns
+
+from bsp.v1._generic.interfaces import AddressBase
+
+
+# timestamp, doc, temperature, dos, opp, internal temperature, internal humidity and the 4 dqid
+RECORD_STRUCT = struct.Struct("<qffffffBBBB")
+TIMESTAMP_STRUCT = struct.Struct("<q")
+
+SEGMENT_RECORDS = 65536
+INDEX_STRIDE = 256
+
+
+def _to_timestamp(date: Union[datetime.datetime, int, float]) -> int:
+    if isinstance(date, datetime.datetime):
+        return int(date.timestamp())
+
+    return int(date)
+
+
+class _Segment():
+    # append only file of fixed width records sorted by timestamp, read through mmap
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start = int(os.path.basename(path).split(".")[0])
+
+        self.mm = None
+        self.size = 0
+        self.index: List[int] = []
+
+    def count(self) -> int:
+        return self.size // RECORD_STRUCT.size
+
+    def repair(self):
+        # drops the partial record an interrupted write left at the end, so the next
+        # append starts on a record boundary
+        with open(self.path, "ab") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size % RECORD_STRUCT.size:
+                f.truncate(size - size % RECORD_STRUCT.size)
+
+    def refresh(self):
+        size = os.path.getsize(self.path)
+        size -= size % RECORD_STRUCT.size
+
+        if size == self.size:
+            return
+
+        self.close()
+
+        if size == 0:
+            self.size = 0
+            return
+
+        with open(self.path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+        self.size = size
+
+        # sparse index: timestamp of one record every INDEX_STRIDE
+        for i in range(len(self.index) * INDEX_STRIDE, self.count(), INDEX_STRIDE):
+            self.index.append(self.get_timestamp(i))
+
+    def close(self):
+        if self.mm is None:
+            return
+
+        try:
+            self.mm.close()
+        except BufferError:
+            # zero copy views are still alive, the map is released with them
+            pass
+
+        self.mm = None
+        self.size = 0
+
+    def get_timestamp(self, i: int) -> int:
+        return TIMESTAMP_STRUCT.unpack_from(self.mm, i * RECORD_STRUCT.size)[0]
+
+    def find(self, timestamp: int) -> int:
+        # first record with a timestamp >= the one given
+        k = bisect.bisect_left(self.index, timestamp)
+
+        lo = max(k - 1, 0) * INDEX_STRIDE
+        hi = min(k * INDEX_STRIDE, self.count())
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def get_view(self, start: int, end: int) -> memoryview:
+        return memoryview(self.mm)[self.find(start) * RECORD_STRUCT.size:self.find(end) * RECORD_STRUCT.size]
+
+
+class _NodeStore():
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        self.segments = [_Segment(os.path.join(path, name))
+                         for name in sorted(os.listdir(path)) if name.endswith(".seg")]
+        self.segments.sort(key=lambda segment: segment.start)
+
+        self.last_timestamp = None
+        for segment in self.segments:
+            segment.repair()
+            segment.refresh()
+
+        if self.segments and self.segments[-1].count():
+            last = self.segments[-1]
+            self.last_timestamp = last.get_timestamp(last.count() - 1)
+
+    def append(self, records: List[tuple]) -> int:
+        appended = 0
+        buffer = []
+
+        for record in records:
+            if self.last_timestamp is not None and record[0] <= self.last_timestamp:
+                continue
+
+            if not self.segments or self.segments[-1].count() + len(buffer) >= SEGMENT_RECORDS:
+                self._write(buffer)
+                buffer = []
+
+                self.segments.append(_Segment(os.path.join(self.path, "{:012d}.seg".format(record[0]))))
+                open(self.segments[-1].path, "ab").close()
+
+            buffer.append(RECORD_STRUCT.pack(*record))
+            self.last_timestamp = record[0]
+            appended += 1
+
+        self._write(buffer)
+        return appended
+
+    def _write(self, buffer: List[bytes]):
+        if not buffer:
+            return
+
+        self.segments[-1].repair()
+
+        with open(self.segments[-1].path, "ab") as f:
+            f.write(b"".join(buffer))
+
+        self.segments[-1].refresh()
+
+    def get_views(self, start: int, end: int) -> List[memoryview]:
+        i = max(bisect.bisect_right([segment.start for segment in self.segments], start) - 1, 0)
+
+        views = []
+        for segment in self.segments[i:]:
+            if segment.start >= end:
+                break
+
+            if segment.mm is None:
+                continue
+
+            view = segment.get_view(start, end)
+            if len(view):
+                views.append(view)
+
+        return views
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+
+
+class SampleStore():
+    # Keeps every oxigenometro sample on disk, one directory per node with append only
+    # segments of fixed width records; range queries go through a sparse time index
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.nodes: Dict[str, _NodeStore] = {}
+
+        os.makedirs(path, exist_ok=True)
+
+    def _get_node(self, address: AddressBase) -> _NodeStore:
+        key = "{}-{}-{}".format(address.group, address.node, address.channel)
+
+        if key not in self.nodes:
+            self.nodes[key] = _NodeStore(os.path.join(self.path, key))
+
+        return self.nodes[key]
+
+    def append(self, address: AddressBase, samples: Union[List[Sample], SampleColumns]) -> int:
+        if isinstance(samples, SampleColumns):
+            records = zip(samples.timestamp,
+                          samples.dissolve_oxygen_concentration,
+                          samples.temperature,
+                          samples.dissolve_oxygen_saturation,
+                          samples.oxygen_partial_pressure,
+                          samples.internal_temperature,
+                          samples.internal_humidity,
+                          samples.doc_dqid,
+                          samples.temp_dqid,
+                          samples.dos_dqid,
+                          samples.opp_dqid)
+        else:
+            records = [(int(s.date.timestamp()),
+                        s.dissolve_oxygen_concentration,
+                        s.temperature,
+                        s.dissolve_oxygen_saturation,
+                        s.oxygen_partial_pressure,
+                        s.internal_temperature,
+                        s.internal_humidity,
+                        s.doc_dqid,
+                        s.temp_dqid,
+                        s.dos_dqid,
+                        s.opp_dqid) for s in samples if s.valid]
+
+        records = sorted(records, key=lambda record: record[0])
+
+        with self.lock:
+            return self._get_node(address).append(records)
+
+    def get_last_timestamp(self, address: AddressBase) -> Union[int, None]:
+        with self.lock:
+            return self._get_node(address).last_timestamp
+
+    def get_views(self, address: AddressBase,
+                  start: Union[datetime.datetime, int],
+                  end: Union[datetime.datetime, int]) -> List[memoryview]:
+        # zero copy views over the mapped records in [start, end), one per segment
+        with self.lock:
+            return self._get_node(address).get_views(_to_timestamp(start), _to_timestamp(end))
+
+    def get_columns(self, address: AddressBase,
+                    start: Union[datetime.datetime, int],
+                    end: Union[datetime.datetime, int]) -> SampleColumns:
+
+        columns = SampleColumns()
+
+        for view in self.get_views(address, start, end):
+            timestamp, \
+            doc, temperature, dos, opp, internal_temperature, internal_humidity, \
+            doc_dqid, temp_dqid, dos_dqid, opp_dqid = zip(*RECORD_STRUCT.iter_unpack(view))
+
+            columns.timestamp.extend(timestamp)
+            columns.dissolve_oxygen_concentration.extend(doc)
+            columns.doc_dqid.extend(doc_dqid)
+            columns.temperature.extend(temperature)
+            columns.temp_dqid.extend(temp_dqid)
+            columns.dissolve_oxygen_saturation.extend(dos)
+            columns.dos_dqid.extend(dos_dqid)
+            columns.oxygen_partial_pressure.extend(opp)
+            columns.opp_dqid.extend(opp_dqid)
+            columns.internal_temperature.extend(internal_temperature)
+            columns.internal_humidity.extend(internal_humidity)
+
+            view.release()
+
+        return columns
+
+    def close(self):
+        with self.lock:
+            for node in self.nodes.values():
+                node.close()
+
+            self.nodes = {}
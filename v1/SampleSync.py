@@ -0,0 +1,151 @@
+#!/usr/bin/python3.7
+import datetime, json, os, threading
+
+from typing import Dict, List, Set, Union
+from dataclasses import dataclass, field
+
+from bsp.v1.Process import Process, GatewayResponse
+from bsp.v1.Session import GatewaySession
+from bsp.v1.SampleStore import SampleStore
+
+from bsp.v1.oxygenometro import parameter_interfaces as OxigenometroParameterInterfaces, \
+    interfaces as OxigenometroInterfaces, metadata_interfaces as OxigenometroMetadataInterfaces
+
+from bsp.v1._generic import utils, interfaces as GenericInterfaces
+
+
+class WatermarkStore():
+    # last sample timestamp (epoch) already collected for each node, persisted as json
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.watermarks: Dict[str, int] = {}
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.watermarks = {k: int(v) for k, v in json.load(f).items()}
+
+    @staticmethod
+    def get_key(address: GenericInterfaces.AddressBase) -> str:
+        return "{}-{}-{}".format(address.group, address.node, address.channel)
+
+    def get(self, address: GenericInterfaces.AddressBase) -> Union[int, None]:
+        with self.lock:
+            return self.watermarks.get(WatermarkStore.get_key(address))
+
+    def set(self, address: GenericInterfaces.AddressBase, timestamp: int):
+        with self.lock:
+            self.watermarks[WatermarkStore.get_key(address)] = int(timestamp)
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.watermarks, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class SyncResult:
+    address: GenericInterfaces.AddressBase
+    status: str = ""
+    watermark: Union[int, None] = None
+    requests: int = 0
+    drained: bool = False
+    samples: List[OxigenometroMetadataInterfaces.Sample] = field(default_factory=list)
+    responses: List[GatewayResponse] = field(repr=False, default_factory=list)
+
+
+class SampleSync():
+    # Downloads only samples newer than the watermark of each node, calling read_samples
+    # until a reply comes back with less than a full frame of samples
+
+    def __init__(self,
+                 retries: int,
+                 timeout_ms: int,
+                 watermark_path: str,
+                 initial_window: datetime.timedelta = datetime.timedelta(days=1),
+                 max_requests: int = 50,
+                 session: GatewaySession = None,
+                 sample_store: SampleStore = None):
+
+        self.retries = retries
+        self.timeout_ms = timeout_ms
+        self.store = WatermarkStore(watermark_path)
+        self.initial_window = initial_window
+        self.max_requests = max_requests
+        self.session = session
+        self.sample_store = sample_store
+
+    def _send_command(self, **kwargs) -> GatewayResponse:
+        if self.session is not None:
+            return self.session.send_command(**kwargs)
+
+        return Process.send_command(**kwargs)
+
+    def sync_node(self, hw_id: int, group: int, node: int, channel: int) -> SyncResult:
+        address = GenericInterfaces.AddressBase(group=group, node=node, channel=channel)
+        result = SyncResult(address=address, watermark=self.store.get(address))
+
+        seen: Set[int] = set()
+
+        while result.requests < self.max_requests:
+            if result.watermark is None:
+                date = datetime.datetime.now(tz=datetime.timezone.utc) - self.initial_window
+            else:
+                date = datetime.datetime.fromtimestamp(result.watermark + 1, tz=datetime.timezone.utc)
+
+            gw_r = self._send_command(
+                retries=self.retries, timeout_ms=self.timeout_ms, hw_id=hw_id,
+                address=address,
+                command=OxigenometroInterfaces.Commands.read_samples,
+                parameter=OxigenometroParameterInterfaces.SamplesFrom(
+                    date=date.astimezone()
+                ),
+                matadata_received_dc=OxigenometroMetadataInterfaces.ReadSamples
+            )
+
+            result.requests += 1
+            result.responses.append(gw_r)
+
+            if gw_r is None:
+                result.status = utils.ERROR_LORA_NETWORK
+                return result
+
+            if not gw_r.is_response_ok():
+                result.status = gw_r.status.base_station if gw_r.status.base_station != utils.OK else gw_r.status.node
+                return result
+
+            result.status = utils.OK
+
+            new_samples = []
+            for sample in gw_r.data_received.metadata.samples:
+                timestamp = int(sample.date.timestamp())
+
+                if timestamp in seen or (result.watermark is not None and timestamp <= result.watermark):
+                    continue
+
+                seen.add(timestamp)
+                new_samples.append(sample)
+
+            if not new_samples:
+                result.drained = True
+                return result
+
+            if self.sample_store is not None:
+                self.sample_store.append(address, new_samples)
+
+            result.samples += new_samples
+            result.watermark = max(int(sample.date.timestamp()) for sample in new_samples)
+            self.store.set(address, result.watermark)
+
+            # a frame with room left means the node had nothing more after these
+            if len(gw_r.data_received.metadata.samples) < OxigenometroMetadataInterfaces.MAX_SAMPLES:
+                result.drained = True
+                return result
+
+        return result
@@ -0,0 +1,170 @@
+#!/usr/bin/python3.7
+from typing import List, Type, Union
+
+from _common.E22_UART import E22_UART
+
+from bsp.v1.Transport import Transport
+from bsp.v1.Process import Process, GatewayResponse, CommandJob
+from bsp.v1.Compact import CompactResponse, compact_metadata_dc
+
+from bsp.v1._generic import utils
+from bsp.v1._generic.metrics import metrics
+from bsp.v1._generic.interfaces import Command, Status, AddressBase, MetadataBase, ParameterBase
+
+
+class GatewaySession():
+    # Keeps the E22 in transparent mode between commands, the radio only goes back
+    # to command mode when the base station address or channel has to change.
+    # Without a transport the session drives Process.transport and shares
+    # Process.radio_state, with one it keeps the state of its own radio.
+
+    def __init__(self, transport: Union[Type[E22_UART], Transport, None] = None):
+        self.serial_o = None
+        self.transport = transport
+        self.radio_state: Union[List[int], None] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self.serial_o is None:
+            return
+
+        self.serial_o.close()
+        self.serial_o = None
+
+    def get_transport(self) -> Union[Type[E22_UART], Transport]:
+        return self.transport if self.transport is not None else Process.transport
+
+    def get_radio_state(self) -> Union[List[int], None]:
+        return self.radio_state if self.transport is not None else Process.radio_state
+
+    def restart(self):
+        self.close()
+        self.get_transport().restart_lora_module()
+
+        if self.transport is None:
+            Process.invalidate_radio_state()
+        self.radio_state = None
+
+    def _check_addh_channel(self, address: AddressBase) -> bool:
+        bs_add = address.get_base_station_address_channel()
+
+        if self.get_radio_state() == bs_add and self.serial_o is not None:
+            return True
+
+        self.close()
+
+        if self.transport is None:
+            return Process._check_addh_channel(address)
+
+        self.radio_state = None
+        if not Process._load_base_station(self.transport, bs_add):
+            return False
+
+        self.radio_state = bs_add
+        return True
+
+    def send_command(
+            self,
+            retries: int,
+            timeout_ms: int,
+            hw_id: int,
+            address: AddressBase,
+            command: Command,
+            parameter: ParameterBase,
+            matadata_received_dc: Union[Type[MetadataBase], MetadataBase],
+            compact: bool = False
+    ) -> Union[GatewayResponse, CompactResponse]:
+
+        if compact:
+            gw_r = self.send_command(retries=retries, timeout_ms=timeout_ms, hw_id=hw_id,
+                                     address=address,
+                                     command=command,
+                                     parameter=parameter,
+                                     matadata_received_dc=compact_metadata_dc(matadata_received_dc))
+
+            return CompactResponse.from_response(gw_r)
+
+        with metrics.command(command.command_send.name, address):
+            return self._send_command(retries, timeout_ms, hw_id, address, command, parameter, matadata_received_dc)
+
+    def _send_command(
+            self,
+            retries: int,
+            timeout_ms: int,
+            hw_id: int,
+            address: AddressBase,
+            command: Command,
+            parameter: ParameterBase,
+            matadata_received_dc: Union[Type[MetadataBase], MetadataBase]
+    ) -> GatewayResponse:
+
+        data_send = Process._create_data_send(hw_id, address, command, parameter)
+        if isinstance(data_send, GatewayResponse):
+            return data_send
+
+        gw_r = Process._get_cached(address, command, parameter)
+        if gw_r is not None:
+            return gw_r
+
+        #-------------------------------------------
+        # reconfigure base station only when the group or channel changes
+        with metrics.span("check_addh_channel"):
+            radio_ready = self._check_addh_channel(address)
+
+        if not radio_ready:
+            status = Status(base_station=utils.ERROR_LORA_BASE_STATION)
+            gw_r = GatewayResponse(address=address, status=status, data_sent=data_send)
+            return gw_r
+
+        if self.serial_o is None:
+            with metrics.span("mode_transparent"):
+                self.serial_o = self.get_transport().set_mode_transparent_transmition()
+
+        return Process._transmit_once(self.serial_o, retries, timeout_ms, data_send, command, matadata_received_dc,
+                                      transport=self.get_transport())
+
+    def send_commands(self, retries: int, timeout_ms: int, jobs: List[CommandJob],
+                      compact: bool = False, window: int = 1) -> List[Union[GatewayResponse, CompactResponse]]:
+        responses = [None] * len(jobs)
+
+        if window > 1:
+            for indexes in Process._get_batches(jobs, self.get_radio_state()):
+                requests = Process._prepare_window(jobs, indexes, compact, responses)
+                if not requests:
+                    continue
+
+                with metrics.span("check_addh_channel"):
+                    radio_ready = self._check_addh_channel(jobs[requests[0][0]].address)
+
+                if not radio_ready:
+                    Process._fail_window(requests, compact, responses)
+                    continue
+
+                if self.serial_o is None:
+                    with metrics.span("mode_transparent"):
+                        self.serial_o = self.get_transport().set_mode_transparent_transmition()
+
+                gw_r_lst = Process._transmit_window(self.serial_o, retries, timeout_ms, window,
+                                                    [request for _, request in requests],
+                                                    transport=self.get_transport())
+                Process._finish_window(requests, gw_r_lst, compact, responses)
+
+            return responses
+
+        for i in Process._get_schedule(jobs, self.get_radio_state()):
+            job = jobs[i]
+            responses[i] = self.send_command(
+                retries=retries, timeout_ms=timeout_ms, hw_id=job.hw_id,
+                address=job.address,
+                command=job.command,
+                parameter=job.parameter,
+                matadata_received_dc=job.matadata_received_dc,
+                compact=compact
+            )
+
+        return responses
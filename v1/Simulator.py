@@ -0,0 +1,570 @@
+#!/usr/bin/python3.7
+import abc, bisect, math, random, threading, time
+
+from typing import Callable, Dict, List, Tuple, Union
+
+from bsp.v1.Transport import Transport
+
+from bsp.v1.aireador import errors as AireadorErrors, interfaces as AireadorInterfaces, \
+    metadata_interfaces as AireadorMetadataInterfaces, parameter_interfaces as AireadorParameterInterfaces
+from bsp.v1.oxygenometro import errors as OxigenometroErrors, interfaces as OxigenometroInterfaces, \
+    metadata_interfaces as OxigenometroMetadataInterfaces, parameter_interfaces as OxigenometroParameterInterfaces
+
+from bsp.v1._generic import methods, interfaces as GenericInterfaces
+from bsp.v1._generic.interfaces import AddressBase, CommandBase, VersionBase, \
+    DATA_SEND_HEADER_SCHEMA, CRC_SCHEMA, EXECUTION_ID_SCHEMA
+from bsp.v1._generic.parameter_interfaces import SYNC_TIME_SCHEMA
+
+# E22 registers: ADDH, ADDL, NETID, REG0 (uart, air rate), REG1, REG2 (channel), REG3, CRYPT_H, CRYPT_L
+DEFAULT_REGISTERS = [0x00, 0x00, 0x00, 0x62, 0x00, 0x17, 0x03, 0x00, 0x00]
+REG3_RSSI_BYTE = 0x80
+
+# largest frame the E22 sends in one packet
+MAX_PACKET_SIZE = 240
+
+COMMAND_MODE = "command"
+TRANSPARENT_MODE = "transparent"
+
+
+def _get_error_code(errors_received: List[CommandBase], name: str) -> int:
+    return next(error.code for error in errors_received if error.name == name)
+
+
+class SimulatedNode(abc.ABC):
+    # Node firmware: checks the frame, runs the command and builds the reply frame
+    # [FW, HW, addh, addl] + header + [command code] + data + crc
+
+    ERRORS: List[CommandBase] = []
+
+    def __init__(self, address: AddressBase, version: VersionBase,
+                 rssi: float = -60.0,
+                 temperature: float = 25.0,
+                 humidity: float = 60.0,
+                 clock_offset_s: float = 0.0,
+                 drift_ppm: float = 0.0):
+
+        self.address = address
+        self.version = version
+        self.rssi = rssi
+        self.temperature = temperature
+        self.humidity = humidity
+
+        # node clock = real clock + offset + drift since creation
+        self.created = time.time()
+        self.clock_offset_s = clock_offset_s
+        self.drift_ppm = drift_ppm
+
+        self.handlers: Dict[int, Callable[[memoryview], Tuple[int, bytes]]] = {
+            GenericInterfaces.Commands.read_status.command_send.code: self._read_status,
+            GenericInterfaces.Commands.sync_time.command_send.code: self._sync_time,
+            GenericInterfaces.Commands.stop.command_send.code: self._stop,
+            GenericInterfaces.Commands.config_boot.command_send.code: self._config_boot,
+        }
+
+        self.commands_received = 0
+
+    def get_time(self) -> float:
+        now = time.time()
+        return now + self.clock_offset_s + (now - self.created) * self.drift_ppm / 1e6
+
+    def set_time(self, timestamp: float):
+        now = time.time()
+        self.clock_offset_s = timestamp - now - (now - self.created) * self.drift_ppm / 1e6
+
+    def _error(self, name: str, data: bytes = b"") -> Tuple[int, bytes]:
+        return _get_error_code(self.ERRORS, name), data
+
+    @abc.abstractmethod
+    def _get_header(self, cmd_code: int) -> bytes:
+        pass
+
+    def handle(self, frame: bytes) -> Union[bytes, None]:
+        # frame without the [addh, addl, channel] prefix consumed by the E22
+        view = memoryview(frame)
+        if len(view) < DATA_SEND_HEADER_SCHEMA.size + CRC_SCHEMA.size:
+            return None
+
+        self.commands_received += 1
+
+        fw, hw, _, _, cmd = DATA_SEND_HEADER_SCHEMA.decode(view)
+        params = view[DATA_SEND_HEADER_SCHEMA.size:-CRC_SCHEMA.size]
+
+        if CRC_SCHEMA.decode(view, len(view) - CRC_SCHEMA.size)[0] != methods.calculate_crc(view[:-CRC_SCHEMA.size]):
+            cmd_code, data = self._error("ERROR_CRC")
+
+        elif fw != self.version.FW:
+            cmd_code, data = self._error("ERROR_INCOMPATIBLE_FW_VERSION")
+
+        elif hw != self.version.HW:
+            cmd_code, data = self._error("ERROR_INCOMPATIBLE_HW_ID")
+
+        elif cmd not in self.handlers:
+            cmd_code, data = self._error("ERROR_UNKNOWN_CMD")
+
+        else:
+            cmd_code, data = self.handlers[cmd](params)
+
+        reply = bytes([self.version.FW, self.version.HW, self.address.addh, self.address.addl]) + \
+                self._get_header(cmd_code) + data
+
+        return reply + CRC_SCHEMA.encode(methods.calculate_crc(reply))
+
+    # ----------------------------------------
+    # commands of every node
+    @abc.abstractmethod
+    def _read_status(self, params: memoryview) -> Tuple[int, bytes]:
+        pass
+
+    def _sync_time(self, params: memoryview) -> Tuple[int, bytes]:
+        if len(params) != SYNC_TIME_SCHEMA.size:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        self.set_time(SYNC_TIME_SCHEMA.decode(params)[0])
+        return GenericInterfaces.Commands.sync_time.command_received.code, b""
+
+    @abc.abstractmethod
+    def _stop(self, params: memoryview) -> Tuple[int, bytes]:
+        pass
+
+    def _config_boot(self, params: memoryview) -> Tuple[int, bytes]:
+        return GenericInterfaces.Commands.config_boot.command_received.code, b""
+
+
+class SimulatedAireador(SimulatedNode):
+    ERRORS = AireadorErrors.errors_received
+
+    IDLE, TIMER, STANDALONE, OXYGEN = range(4)
+
+    def __init__(self, address: AddressBase, version: VersionBase, port_in: int = 0x02, **kwargs):
+        super().__init__(address, version, **kwargs)
+
+        self.mode = self.IDLE
+        self.port_in = port_in
+        self.port_out = 0
+        self.schedule = b""
+        self.timer_end = 0.0
+
+        self.handlers.update({
+            AireadorInterfaces.Commands.read_schedule.command_send.code: self._read_schedule,
+            AireadorInterfaces.Commands.run_timer_mode.command_send.code: self._run_timer_mode,
+            AireadorInterfaces.Commands.run_standalone_mode.command_send.code: self._run_standalone_mode,
+            AireadorInterfaces.Commands.run_oxygen_mode.command_send.code: self._run_oxygen_mode,
+            AireadorInterfaces.Commands.set_capacitor.command_send.code: self._set_capacitor,
+        })
+
+    def _get_header(self, cmd_code: int) -> bytes:
+        return AireadorInterfaces.DATA_RECEIVED_HEADER_SCHEMA.encode(
+            int(self.temperature * 2), int(self.humidity * 2), int(self.get_time()), cmd_code)
+
+    def _update(self):
+        # the timer mode goes back to idle once its duration is over
+        if self.mode == self.TIMER and self.get_time() >= self.timer_end:
+            self.mode = self.IDLE
+
+    def _read_status(self, params: memoryview) -> Tuple[int, bytes]:
+        self._update()
+
+        port_out_live = self.port_out if self.mode != self.IDLE else self.port_out & 0x10
+        return GenericInterfaces.Commands.read_status.command_received.code, \
+               AireadorMetadataInterfaces.READ_STATUS_SCHEMA.encode(self.mode, self.port_in, self.port_out, port_out_live)
+
+    def _stop(self, params: memoryview) -> Tuple[int, bytes]:
+        self.mode = self.IDLE
+        return GenericInterfaces.Commands.stop.command_received.code, b""
+
+    def _read_schedule(self, params: memoryview) -> Tuple[int, bytes]:
+        return AireadorInterfaces.Commands.read_schedule.command_received.code, \
+               AireadorMetadataInterfaces.READ_SCHEDULE_SCHEMA.encode(self.port_out) + self.schedule
+
+    def _run_timer_mode(self, params: memoryview) -> Tuple[int, bytes]:
+        if len(params) != AireadorParameterInterfaces.TIMER_MODE_SCHEMA.size:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        date, port_out, duracion = AireadorParameterInterfaces.TIMER_MODE_SCHEMA.decode(params)
+
+        self.set_time(date)
+        self.mode = self.TIMER
+        self.port_out = port_out
+        self.timer_end = date + duracion * 60
+
+        return AireadorInterfaces.Commands.run_timer_mode.command_received.code, b""
+
+    def _run_schedule_mode(self, params: memoryview, mode: int, command: GenericInterfaces.Command) -> Tuple[int, bytes]:
+        # standalone and oxygen mode share the parameters
+        size = AireadorParameterInterfaces.SCHEDULE_MODE_SCHEMA.size
+        if len(params) < size or (len(params) - size) % 4 != 0:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        date, port_out = AireadorParameterInterfaces.SCHEDULE_MODE_SCHEMA.decode(params)
+
+        self.set_time(date)
+        self.mode = mode
+        self.port_out = port_out
+        self.schedule = bytes(params[size:])
+
+        return command.command_received.code, b""
+
+    def _run_standalone_mode(self, params: memoryview) -> Tuple[int, bytes]:
+        return self._run_schedule_mode(params, self.STANDALONE, AireadorInterfaces.Commands.run_standalone_mode)
+
+    def _run_oxygen_mode(self, params: memoryview) -> Tuple[int, bytes]:
+        return self._run_schedule_mode(params, self.OXYGEN, AireadorInterfaces.Commands.run_oxygen_mode)
+
+    def _set_capacitor(self, params: memoryview) -> Tuple[int, bytes]:
+        if len(params) != AireadorParameterInterfaces.SET_CAPACITOR_SCHEMA.size:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        # 0 turns the capacitor on, bit 4 of the outputs set means off
+        if AireadorParameterInterfaces.SET_CAPACITOR_SCHEMA.decode(params)[0]:
+            self.port_out |= 0x10
+        else:
+            self.port_out &= ~0x10
+
+        return AireadorInterfaces.Commands.set_capacitor.command_received.code, b""
+
+
+class SimulatedOxigenometro(SimulatedNode):
+    ERRORS = OxigenometroErrors.errors_received
+
+    IDLE, STANDALONE, OXYGEN = range(3)
+
+    # status, salinity and as many samples as fit in one packet
+    MAX_SAMPLES = OxigenometroMetadataInterfaces.MAX_SAMPLES
+
+    def __init__(self, address: AddressBase, version: VersionBase,
+                 battery: float = 3.7, solar_panel: int = 1, modbus_error: bool = False, **kwargs):
+
+        super().__init__(address, version, **kwargs)
+
+        self.battery = battery
+        self.solar_panel = solar_panel
+        self.modbus_error = modbus_error
+
+        self.mode = self.IDLE
+        self.execution_id = 0
+        self.salinity = 0.0
+
+        # (start, end, sampling period in s), end is None while running
+        self.runs: List[List[Union[float, None]]] = []
+
+        self.handlers.update({
+            OxigenometroInterfaces.Commands.read_politics.command_send.code: self._read_politics,
+            OxigenometroInterfaces.Commands.read_samples.command_send.code: self._read_samples,
+            OxigenometroInterfaces.Commands.standalone_mode.command_send.code: self._standalone_mode,
+            OxigenometroInterfaces.Commands.oxygen_mode.command_send.code: self._oxygen_mode,
+        })
+
+    def _get_header(self, cmd_code: int) -> bytes:
+        return OxigenometroInterfaces.DATA_RECEIVED_HEADER_SCHEMA.encode(
+            int(self.temperature * 2), int(self.humidity * 2), self.solar_panel, int(self.battery * 10), cmd_code)
+
+    def _is_running(self) -> bool:
+        return bool(self.runs) and self.runs[-1][1] is None
+
+    def _get_status(self) -> bytes:
+        state = self.mode | (self._is_running() << 2) | (self.modbus_error << 3) | (bool(self.runs) << 4)
+        return OxigenometroMetadataInterfaces.READ_STATUS_SCHEMA.encode(state, int(self.get_time()))
+
+    def get_samples(self, timestamp_from: int, limit: int) -> List[bytes]:
+        now = self.get_time()
+
+        samples = []
+        for start, end, period in self.runs:
+            end = now if end is None else end
+
+            k = max(math.ceil((timestamp_from - start) / period), 1)
+            while start + k * period <= end and len(samples) < limit:
+                timestamp = int(start + k * period)
+                k += 1
+
+                # smooth daily cycle so the values change from sample to sample
+                phase = math.sin(2 * math.pi * (timestamp % 86400) / 86400)
+                doc = 5.5 + 2 * phase
+                samples.append(OxigenometroMetadataInterfaces.SAMPLE_SCHEMA.encode(
+                    timestamp, doc, 0, 28.0 + phase, 0, doc * 14.5, 0, 0.2 + 0.05 * phase, 0,
+                    int(self.temperature * 2), int(self.humidity * 2)))
+
+        return samples
+
+    def _read_status(self, params: memoryview) -> Tuple[int, bytes]:
+        return GenericInterfaces.Commands.read_status.command_received.code, self._get_status()
+
+    def _stop(self, params: memoryview) -> Tuple[int, bytes]:
+        if self._is_running():
+            self.runs[-1][1] = self.get_time()
+
+        self.mode = self.IDLE
+        self.execution_id = 0
+        return GenericInterfaces.Commands.stop.command_received.code, b""
+
+    def _read_politics(self, params: memoryview) -> Tuple[int, bytes]:
+        # the politics layout is not decoded by the gateway, no data is returned
+        return OxigenometroInterfaces.Commands.read_politics.command_received.code, b""
+
+    def _read_samples(self, params: memoryview) -> Tuple[int, bytes]:
+        if len(params) != OxigenometroParameterInterfaces.SAMPLES_FROM_SCHEMA.size:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        timestamp_from = OxigenometroParameterInterfaces.SAMPLES_FROM_SCHEMA.decode(params)[0]
+        samples = self.get_samples(timestamp_from, self.MAX_SAMPLES)
+
+        return OxigenometroInterfaces.Commands.read_samples.command_received.code, \
+               self._get_status() + OxigenometroMetadataInterfaces.SALINITY_SCHEMA.encode(self.salinity) + \
+               b"".join(samples)
+
+    def _start(self, params: memoryview, mode: int) -> Union[Tuple[int, bytes], None]:
+        execution_id, \
+        sampling_time, \
+        _, \
+        salinidad, \
+        crc = OxigenometroParameterInterfaces.STANDALONE_MODE_SCHEMA.decode(params)
+
+        # an application already running answers with its execution id, the gateway
+        # takes it as done when it is one of the dates it sent for the command
+        if self._is_running():
+            return self._error("ERROR_APP_RUNNING", EXECUTION_ID_SCHEMA.encode(self.execution_id))
+
+        salinity_raw = OxigenometroParameterInterfaces.SALINITY_SCHEMA.encode(salinidad)
+        modbus_crc = OxigenometroParameterInterfaces._modbus_crc_func(
+            OxigenometroParameterInterfaces.MODBUS_SALINITY_HEADER + salinity_raw)
+
+        if crc != modbus_crc or sampling_time < 1:
+            return self._error("ERROR_WRONG_PARAMETERS")
+
+        self.set_time(execution_id)
+        self.mode = mode
+        self.execution_id = execution_id
+        self.salinity = salinidad
+        self.runs.append([float(execution_id), None, sampling_time * 60])
+
+        return None
+
+    def _standalone_mode(self, params: memoryview) -> Tuple[int, bytes]:
+        if len(params) != OxigenometroParameterInterfaces.STANDALONE_MODE_SCHEMA.size:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        error = self._start(params, self.STANDALONE)
+        if error:
+            return error
+
+        return OxigenometroInterfaces.Commands.standalone_mode.command_received.code, b""
+
+    def _oxygen_mode(self, params: memoryview) -> Tuple[int, bytes]:
+        size = OxigenometroParameterInterfaces.STANDALONE_MODE_SCHEMA.size
+        if len(params) != size + OxigenometroParameterInterfaces.OXYGEN_MODE_SCHEMA.size:
+            return self._error("ERROR_SIZE_PARAMETERS")
+
+        _, _, slaves = OxigenometroParameterInterfaces.OXYGEN_MODE_SCHEMA.decode(params, size)
+        if slaves > 6:
+            return self._error("ERROR_WRONG_PARAMETERS")
+
+        error = self._start(params[:size], self.OXYGEN)
+        if error:
+            return error
+
+        return OxigenometroInterfaces.Commands.oxygen_mode.command_received.code, b""
+
+
+class SimulatedSerial():
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.closed = False
+
+        # (arrival time, frame) waiting to be read
+        self.replies: List[Tuple[float, List[int]]] = []
+
+    def close(self):
+        self.closed = True
+
+
+class E22Simulator(Transport):
+    # In process E22 module and the nodes around it. Frames reach a node when the
+    # address and channel exist; the reply only reaches the gateway when the E22
+    # registers hold the base station address and channel the node answers to.
+    # With realtime=False the waits only advance a virtual clock (elapsed_s).
+
+    def __init__(self,
+                 latency_ms: float = 50.0,
+                 jitter_ms: float = 0.0,
+                 byte_ms: float = 0.0,
+                 loss: float = 0.0,
+                 corruption: float = 0.0,
+                 mode_switch_ms: float = 0.0,
+                 realtime: bool = True,
+                 seed: Union[int, None] = None):
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.byte_ms = byte_ms
+        self.loss = loss
+        self.corruption = corruption
+        self.mode_switch_ms = mode_switch_ms
+        self.realtime = realtime
+
+        self.lock = threading.RLock()
+        self.random = random.Random(seed)
+
+        self.registers = list(DEFAULT_REGISTERS)
+        self.nodes: Dict[Tuple[int, int, int], SimulatedNode] = {}
+
+        self.elapsed_s = 0.0
+        self.stats = {"sent": 0, "received": 0, "lost": 0, "corrupted": 0, "timeouts": 0, "mode_switches": 0,
+                      "register_writes": 0}
+
+    # ----------------------------------------
+    # nodes
+    def add_node(self, node: SimulatedNode) -> SimulatedNode:
+        with self.lock:
+            self.nodes[(node.address.addh, node.address.addl, node.address.channel)] = node
+
+        return node
+
+    def add_aireador(self, group: int, node: int, channel: int, hw_id: int = 3, **kwargs) -> SimulatedAireador:
+        return self.add_node(SimulatedAireador(AddressBase(group=group, node=node, channel=channel),
+                                               VersionBase(FW=1, HW=hw_id), **kwargs))
+
+    def add_oxigenometro(self, group: int, node: int, channel: int, **kwargs) -> SimulatedOxigenometro:
+        return self.add_node(SimulatedOxigenometro(AddressBase(group=group, node=node, channel=channel),
+                                                   VersionBase(FW=1, HW=1), **kwargs))
+
+    def get_node(self, address: AddressBase) -> Union[SimulatedNode, None]:
+        return self.nodes.get((address.addh, address.addl, address.channel))
+
+    # ----------------------------------------
+    # clock
+    def _now(self) -> float:
+        return time.monotonic() if self.realtime else self.elapsed_s
+
+    def _wait(self, seconds: float):
+        if seconds <= 0:
+            return
+
+        if self.realtime:
+            time.sleep(seconds)
+            return
+
+        with self.lock:
+            self.elapsed_s += seconds
+
+    # ----------------------------------------
+    # transport
+    def set_mode_command_settings(self) -> SimulatedSerial:
+        with self.lock:
+            self.stats["mode_switches"] += 1
+
+        self._wait(self.mode_switch_ms / 1000)
+        return SimulatedSerial(COMMAND_MODE)
+
+    def set_mode_transparent_transmition(self) -> SimulatedSerial:
+        with self.lock:
+            self.stats["mode_switches"] += 1
+
+        self._wait(self.mode_switch_ms / 1000)
+        return SimulatedSerial(TRANSPARENT_MODE)
+
+    def get_operating_parameters(self, serial_o: SimulatedSerial) -> List[int]:
+        if serial_o.closed or serial_o.mode != COMMAND_MODE:
+            return []
+
+        with self.lock:
+            return [0xC1, 0x00, len(self.registers)] + list(self.registers)
+
+    def write_registers(self, serial_o: SimulatedSerial, address: int, length: int, buffer: List[int],
+                        save_option: bool = False) -> bool:
+
+        if serial_o.closed or serial_o.mode != COMMAND_MODE or address + length > len(self.registers):
+            return False
+
+        with self.lock:
+            self.registers[address:address + length] = list(buffer[:length])
+            self.stats["register_writes"] += 1
+
+        return True
+
+    def restart_lora_module(self):
+        with self.lock:
+            self.registers = list(DEFAULT_REGISTERS)
+
+    def print(self, registers: List[int]):
+        print('[{}]'.format(', '.join(hex(x) for x in registers)))
+
+    def safe_send(self, serial_o: SimulatedSerial, raw: Union[bytes, List[int]]):
+        if serial_o.closed or serial_o.mode != TRANSPARENT_MODE or len(raw) < 3:
+            return
+
+        raw = bytes(raw)
+
+        with self.lock:
+            self.stats["sent"] += 1
+
+            # broadcast address reaches every node of the channel
+            if raw[0] == 0xFF and raw[1] == 0xFF:
+                nodes = [node for key, node in self.nodes.items() if key[2] == raw[2]]
+            else:
+                node = self.nodes.get((raw[0], raw[1], raw[2]))
+                nodes = [node] if node is not None else []
+
+            if not nodes:
+                self.stats["lost"] += 1
+
+            for node in nodes:
+                self._deliver(serial_o, node, raw)
+
+    def _deliver(self, serial_o: SimulatedSerial, node: SimulatedNode, raw: bytes):
+        if self.random.random() < self.loss:
+            self.stats["lost"] += 1
+            return
+
+        reply = node.handle(raw[3:])
+        if reply is None:
+            return
+
+        if self.random.random() < self.loss:
+            self.stats["lost"] += 1
+            return
+
+        # the node answers to the base station address of the frame on its channel
+        bs_addh, bs_addl = raw[5], raw[6]
+        if self.registers[0] != bs_addh or self.registers[1] != bs_addl or self.registers[5] != raw[2]:
+            self.stats["lost"] += 1
+            return
+
+        reply = bytearray(reply)
+        if self.random.random() < self.corruption:
+            reply[self.random.randrange(len(reply))] ^= 1 << self.random.randrange(8)
+            self.stats["corrupted"] += 1
+
+        if self.registers[6] & REG3_RSSI_BYTE:
+            reply.append(min(max(int(-2 * node.rssi), 0), 255))
+
+        delay_ms = self.latency_ms + self.byte_ms * (len(raw) + len(reply))
+        if self.jitter_ms:
+            delay_ms += self.random.uniform(-self.jitter_ms, self.jitter_ms)
+
+        # replies share the channel, one only starts once the previous one ended
+        arrival = self._now() + max(delay_ms, 0) / 1000
+        if serial_o.replies:
+            arrival = max(arrival, serial_o.replies[-1][0] + self.byte_ms * len(reply) / 1000)
+
+        bisect.insort(serial_o.replies, (arrival, list(reply)))
+
+    def receive_data(self, serial_o: SimulatedSerial, timeout_ms: int) -> List[int]:
+        now = self._now()
+        deadline = now + timeout_ms / 1000
+
+        if serial_o.replies and serial_o.replies[0][0] <= deadline:
+            arrival, frame = serial_o.replies.pop(0)
+            self._wait(arrival - now)
+
+            with self.lock:
+                self.stats["received"] += 1
+
+            return frame
+
+        self._wait(deadline - now)
+
+        with self.lock:
+            self.stats["timeouts"] += 1
+
+        return []
@@ -0,0 +1,47 @@
+#!/usr/bin/python3.7
+import abc
+
+from typing import List, Union
+
+
+class Transport(abc.ABC):
+    # Operations the gateway needs from the radio. E22_UART provides them as static
+    # methods over the real module, Simulator.E22Simulator emulates module and nodes.
+    # Process.transport selects the one in use.
+
+    E22_REG_OFFSET_ADDH = 0
+    E22_REG_OFFSET_ADDL = 1
+    E22_REG_OFFSET_REG2 = 5
+
+    @abc.abstractmethod
+    def set_mode_command_settings(self):
+        pass
+
+    @abc.abstractmethod
+    def set_mode_transparent_transmition(self):
+        pass
+
+    @abc.abstractmethod
+    def get_operating_parameters(self, serial_o) -> List[int]:
+        # [0xC1, start address, length] + the 9 registers
+        pass
+
+    @abc.abstractmethod
+    def write_registers(self, serial_o, address: int, length: int, buffer: List[int], save_option: bool = False) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def safe_send(self, serial_o, raw: Union[bytes, List[int]]):
+        pass
+
+    @abc.abstractmethod
+    def receive_data(self, serial_o, timeout_ms: int) -> List[int]:
+        # frame followed by the rssi byte, empty when nothing arrived before timeout
+        pass
+
+    @abc.abstractmethod
+    def restart_lora_module(self):
+        pass
+
+    def print(self, registers: List[int]):
+        print(registers)
@@ -1,12 +1,32 @@
 #!/usr/bin/python3.7
-import datetime, struct
+import datetime, itertools, threading, time
 
 from bsp.v1._generic import methods, utils
+from bsp.v1._generic.schema import FrameSchema
+from bsp.v1._generic.metrics import metrics
 
 from typing import List, Union, Type
 from dataclasses import dataclass, field, InitVar
 
 
+DATA_SEND_HEADER_SCHEMA = FrameSchema(("fw", "B"), ("hw", "B"), ("addh", "B"), ("addl", "B"), ("command", "B"))
+CRC_SCHEMA = FrameSchema(("crc", "<L"))
+TRAILER_SCHEMA = FrameSchema(("crc", "<L"), ("rssi", "B"))
+EXECUTION_ID_SCHEMA = FrameSchema(("execution_id", "<L"))
+
+_execution_id_lock = threading.Lock()
+# milliseconds at start, ids keep growing across restarts of the gateway
+_execution_ids = itertools.count(int(time.time() * 1000))
+
+
+def new_execution_id() -> int:
+    # Execution ids only identify a command on the gateway (Process.response_cache and
+    # retries by the caller), they are never sent: the date field carries the current
+    # time of every attempt, see ParameterBase.new_date.
+    with _execution_id_lock:
+        return next(_execution_ids)
+
+
 @dataclass
 class Status:
     base_station: str = ""
@@ -111,9 +131,41 @@ class ParameterBase:
         self.execution_id = 0
         self.valid = True
 
+    def set_execution_id(self, execution_id: Union[int, None]) -> 'ParameterBase':
+        # a caller retrying an earlier command passes its execution id, so
+        # Process.response_cache answers with the response it already got
+        if execution_id:
+            self.execution_id = execution_id
+
+        return self
+
+    def new_date(self) -> int:
+        # Date of a new attempt of a mode command, the node sets its clock to it and
+        # echoes it in ERROR_APP_RUNNING while that execution runs. Every date sent is
+        # kept, the attempt the node ran may be one whose reply was lost.
+        timestamp = time.time()
+        self.date = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).astimezone()
+
+        date = int(timestamp)
+        if not self.dates or self.dates[-1] != date:
+            self.dates.append(date)
+
+        return date
+
+    def is_running(self, device_execution_id: int) -> bool:
+        # ERROR_APP_RUNNING of the node is this command when it echoes a date sent for it
+        return device_execution_id in getattr(self, "dates", ())
+
+    def get_key_bytes(self) -> bytes:
+        # parameters identifying the command in Process.response_cache, without the date
+        return self.get_raw_bytes()
+
     def get_raw(self) -> List[int]:
         return []
 
+    def get_raw_bytes(self) -> bytes:
+        return bytes(self.get_raw())
+
 
 @dataclass
 class CommandBase:
@@ -149,16 +201,21 @@ class DataSendBase:
         self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
         self.raw = []
 
-    def get_raw(self) -> List[int]:
-        buffer = self.version.get_raw() + \
-                 self.address.get_base_station_address() + \
-                 [self.command.code] + \
-                 self.parameter.get_raw()
+    def get_raw_bytes(self) -> bytes:
+        bs_add = self.address.get_base_station_address()
+
+        buffer = DATA_SEND_HEADER_SCHEMA.encode(self.version.FW, self.version.HW, bs_add[0], bs_add[1],
+                                                self.command.code) + \
+                 self.parameter.get_raw_bytes()
 
         crc = methods.calculate_crc(buffer)
-        crc_lst = list(struct.pack("<L", int(crc)))
 
-        self.raw = self.address.get_global_address_channel() + buffer + crc_lst
+        raw = bytes(self.address.get_global_address_channel()) + buffer + CRC_SCHEMA.encode(crc)
+        self.raw = list(raw)
+        return raw
+
+    def get_raw(self) -> List[int]:
+        self.get_raw_bytes()
         return self.raw
 
 
@@ -180,7 +237,7 @@ class DataReceivedBase:
     data: List[int] = field(repr=False, init=False, default_factory=list)
 
     raw: List[int] = field(init=False)
-    rssi: float = field(init=False)
+    rssi: Union[float, None] = field(init=False)
     version: VersionBase = field(init=False)
     command: CommandBase = field(init=False)
     metadata: MetadataBase = field(init=False)
@@ -193,18 +250,40 @@ class DataReceivedBase:
                       parameter_p: ParameterBase,
                       metadata_dc: Union[Type[MetadataBase], MetadataBase]):
 
+        self._parse(stream=stream,
+                    view=methods.as_view(stream),
+                    address=address,
+                    version_p=version_p,
+                    command_p=command_p,
+                    parameter_p=parameter_p,
+                    metadata_dc=metadata_dc)
+
+    def _parse(self,
+               stream: Union[List[int], bytes, bytearray, memoryview],
+               view: memoryview,
+               address: AddressBase,
+               version_p: VersionBase,
+               command_p: CommandBase,
+               parameter_p: ParameterBase,
+               metadata_dc: Union[Type[MetadataBase], MetadataBase]):
+
+        # the whole frame is parsed through one memoryview, raw keeps the list for the response
         self.reception_date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
-        self.raw = stream
+        self.raw = stream if isinstance(stream, list) else view.tolist()
+        # frames too short for the trailer carry no rssi
+        self.rssi = None
+        size = len(view)
 
         # ----------------------------------------
         # check CRC of stream
-        if len(stream) < 5:
+        if size < 5:
             self.status = utils.ERROR_DATA_LENGTH_RECEIVED
             return
 
         self.crc, \
-        rssi = struct.unpack("<LB", bytearray(stream[-5:]))
-        crc = methods.calculate_crc(stream[:-5])
+        rssi = TRAILER_SCHEMA.decode(view, size - 5)
+        with metrics.span("crc"):
+            crc = methods.calculate_crc(view[:-5])
 
         self.rssi = - rssi / 2
 
@@ -214,13 +293,11 @@ class DataReceivedBase:
 
         # ----------------------------------------
         # check Version of stream
-        if len(stream) < 7:
+        if size < 7:
             self.status = utils.ERROR_DATA_LENGTH_RECEIVED
             return
 
-        fw, \
-        hw = struct.unpack("BB", bytearray(stream[:2]))
-        self.version = VersionBase(FW=fw, HW=hw)
+        self.version = VersionBase(FW=view[0], HW=view[1])
 
         if not (self.version.FW == version_p.FW and self.version.HW == version_p.HW):
             self.status = utils.ERROR_INVALID_VERSION
@@ -228,12 +305,12 @@ class DataReceivedBase:
 
         # ----------------------------------------
         # check address of stream
-        if len(stream) < 9:
+        if size < 9:
             self.status = utils.ERROR_DATA_LENGTH_RECEIVED
             return
 
-        self.addh, \
-        self.addl = struct.unpack("BB", bytearray(stream[2:4]))
+        self.addh = view[2]
+        self.addl = view[3]
 
         if not (self.addh == address.addh and self.addl == address.addl):
             self.status = utils.ERROR_DATA_COMMING_FROM_OTHER_DEVICE
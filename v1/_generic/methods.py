@@ -1,31 +1,72 @@
 #!/usr/bin/python3.7
-import crcmod
+import array, crcmod, struct
 
-from typing import List
+from typing import List, Union, Iterable
 
-def transform_to_little_endian(response_big_endian: List[int]) -> List[int]:
-    response_little_endian = []
-    for i in range(0, len(response_big_endian), 4):
-        if i + 3 >= len(response_big_endian):
-            break
+BytesLike = Union[bytes, bytearray, memoryview, List[int]]
 
-        response_little_endian.append(response_big_endian[i + 3])
-        response_little_endian.append(response_big_endian[i + 2])
-        response_little_endian.append(response_big_endian[i + 1])
-        response_little_endian.append(response_big_endian[i])
+# crc32 (poly 0x04C11DB7, not reflected) over little endian 32 bit words, built once
+_crc32_func = crcmod.mkCrcFun(0x104c11db7, rev=False, initCrc=0xFFFFFFFF, xorOut=0x00000000)
 
-    if len(response_big_endian) % 4 != 0:
-        add = [0] * (4 - (len(response_big_endian) % 4))
-        tmp = response_big_endian[int(len(response_big_endian) / 4) * 4:] + add
+_WORD_TYPECODE = "I" if array.array("I").itemsize == 4 else "L"
 
-        response_little_endian.append(tmp[3])
-        response_little_endian.append(tmp[2])
-        response_little_endian.append(tmp[1])
-        response_little_endian.append(tmp[0])
 
-    return response_little_endian
+def as_view(data: BytesLike) -> memoryview:
+    if isinstance(data, memoryview):
+        return data
 
-def calculate_crc(data: List[int]) -> int:
-    crc32_func = crcmod.mkCrcFun(0x104c11db7, rev=False, initCrc=0xFFFFFFFF, xorOut=0x00000000)
-    data = transform_to_little_endian(data)
-    return crc32_func(bytearray(data))
\ No newline at end of file
+    if isinstance(data, (bytes, bytearray)):
+        return memoryview(data)
+
+    return memoryview(bytes(data))
+
+
+def _swap_words(data: BytesLike) -> bytes:
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+
+    size = len(data)
+    aligned = size - size % 4
+
+    words = array.array(_WORD_TYPECODE)
+    words.frombytes(data[:aligned])
+
+    if aligned != size:
+        words.frombytes(bytes(data[aligned:]) + bytes(4 - size + aligned))
+
+    words.byteswap()
+    return words.tobytes()
+
+
+def transform_to_little_endian(response_big_endian: BytesLike) -> List[int]:
+    return list(_swap_words(response_big_endian))
+
+
+def calculate_crc(data: BytesLike) -> int:
+    return _crc32_func(_swap_words(data))
+
+
+def calculate_crc_batch(data_lst: Iterable[BytesLike]) -> List[int]:
+    crc32_func = _crc32_func
+    swap_words = _swap_words
+    return [crc32_func(swap_words(data)) for data in data_lst]
+
+
+def check_crc_batch(frames: Iterable[BytesLike]) -> List[bool]:
+    # received frames: payload + crc (<L) + rssi (B)
+    crc32_func = _crc32_func
+    swap_words = _swap_words
+    unpack_crc = struct.Struct("<L").unpack_from
+
+    result = []
+    for frame in frames:
+        if not isinstance(frame, (bytes, bytearray, memoryview)):
+            frame = bytes(frame)
+
+        if len(frame) < 5:
+            result.append(False)
+            continue
+
+        result.append(unpack_crc(frame, len(frame) - 5)[0] == crc32_func(swap_words(frame[:-5])))
+
+    return result
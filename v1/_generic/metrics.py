@@ -0,0 +1,209 @@
+#!/usr/bin/python3.7
+import bisect, json, os, threading, time
+
+from typing import Dict, List, Union
+from dataclasses import dataclass, field
+
+# upper bound of every histogram bucket in ms, the last bucket has no bound
+BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+TOTAL = "total"
+
+
+@dataclass
+class Histogram:
+    counts: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    count: int = 0
+    total_ms: float = 0.0
+    min_ms: Union[float, None] = None
+    max_ms: Union[float, None] = None
+
+    def add(self, value_ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+
+        if self.min_ms is None or value_ms < self.min_ms:
+            self.min_ms = value_ms
+
+        if self.max_ms is None or value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def get_percentile(self, p: float) -> Union[float, None]:
+        # upper bound of the bucket holding the percentile, max for the open bucket
+        if not self.count:
+            return None
+
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {"count": self.count,
+                "total_ms": self.total_ms,
+                "mean_ms": self.total_ms / self.count if self.count else None,
+                "min_ms": self.min_ms,
+                "max_ms": self.max_ms,
+                "p50_ms": self.get_percentile(50),
+                "p90_ms": self.get_percentile(90),
+                "p99_ms": self.get_percentile(99),
+                "buckets_ms": list(BUCKETS_MS),
+                "counts": list(self.counts)}
+
+
+class _NullSpan():
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span():
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: 'Metrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.add(self.stage, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _CommandSpan():
+    __slots__ = ("metrics", "command", "node", "total", "previous", "start")
+
+    def __init__(self, metrics: 'Metrics', command: str, node: str, total: bool = True):
+        self.metrics = metrics
+        self.command = command
+        self.node = node
+        self.total = total
+
+    def __enter__(self):
+        local = self.metrics.local
+        self.previous = getattr(local, "labels", None)
+        local.labels = (self.command, self.node)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.total:
+            self.metrics.add(TOTAL, (time.perf_counter() - self.start) * 1000)
+        self.metrics.local.labels = self.previous
+        return False
+
+
+class Metrics():
+    # Timing spans of every stage of a command, collected in histograms per stage,
+    # per command and stage and per node and stage. Disabled spans are a shared no
+    # op context manager so instrumented code costs one attribute check.
+
+    def __init__(self):
+        self.enabled = False
+
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+        self.stages: Dict[str, Histogram] = {}
+        self.commands: Dict[str, Dict[str, Histogram]] = {}
+        self.nodes: Dict[str, Dict[str, Histogram]] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.commands = {}
+            self.nodes = {}
+
+    def command(self, command: str, address):
+        # labels the spans of the current thread with the command and node
+        if not self.enabled:
+            return NULL_SPAN
+
+        return _CommandSpan(self, command, self._get_node(address))
+
+    def label(self, command: str, address):
+        # labels the spans like command, for commands interleaved in one window whose
+        # total is added apart with add_command
+        if not self.enabled:
+            return NULL_SPAN
+
+        return _CommandSpan(self, command, self._get_node(address), total=False)
+
+    def add_command(self, command: str, address, value_ms: float):
+        if not self.enabled:
+            return
+
+        with self.label(command, address):
+            self.add(TOTAL, value_ms)
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return NULL_SPAN
+
+        return _Span(self, stage)
+
+    @staticmethod
+    def _get_node(address) -> str:
+        return "{}-{}-{}".format(address.group, address.node, address.channel)
+
+    @staticmethod
+    def _get_histogram(histograms: Dict[str, Histogram], stage: str) -> Histogram:
+        histogram = histograms.get(stage)
+        if histogram is None:
+            histogram = Histogram()
+            histograms[stage] = histogram
+
+        return histogram
+
+    def add(self, stage: str, value_ms: float):
+        labels = getattr(self.local, "labels", None)
+
+        with self.lock:
+            self._get_histogram(self.stages, stage).add(value_ms)
+
+            if labels is None:
+                return
+
+            command, node = labels
+            self._get_histogram(self.commands.setdefault(command, {}), stage).add(value_ms)
+            self._get_histogram(self.nodes.setdefault(node, {}), stage).add(value_ms)
+
+    def get_snapshot(self) -> dict:
+        with self.lock:
+            return {"stages": {stage: h.to_dict() for stage, h in self.stages.items()},
+                    "commands": {command: {stage: h.to_dict() for stage, h in stages.items()}
+                                 for command, stages in self.commands.items()},
+                    "nodes": {node: {stage: h.to_dict() for stage, h in stages.items()}
+                              for node, stages in self.nodes.items()}}
+
+    def dump(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.get_snapshot(), f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, path)
+
+
+metrics = Metrics()
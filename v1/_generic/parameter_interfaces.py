@@ -1,24 +1,32 @@
 #!/usr/bin/python3.7
 
 import datetime
-import struct
 import time
 
 from bsp.v1._generic.interfaces import ParameterBase
+from bsp.v1._generic.schema import FrameSchema
 
 from typing import List
 from dataclasses import dataclass, field
 
+
+SYNC_TIME_SCHEMA = FrameSchema(("date", "<L"))
+
+
 @dataclass
 class SyncTime(ParameterBase):
     date: datetime.datetime = field(init=False)
 
     def __post_init__(self):
+        # setting the clock again only moves it to the current time
+        self.execution_id = 0
         self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
         self.valid = True
 
-    def get_raw(self) -> List[int]:
+    def get_raw_bytes(self) -> bytes:
         self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
-        date_lst = list(struct.pack("<L", int(time.mktime(self.date.astimezone().timetuple()))))
 
-        return  date_lst
\ No newline at end of file
+        return SYNC_TIME_SCHEMA.encode(int(time.mktime(self.date.astimezone().timetuple())))
+
+    def get_raw(self) -> List[int]:
+        return list(self.get_raw_bytes())
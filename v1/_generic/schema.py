@@ -0,0 +1,77 @@
+#!/usr/bin/python3.7
+import struct
+
+from typing import Tuple, List
+
+BYTE_ORDERS = "<>!=@"
+SINGLE_BYTE_CODES = "bBc?"
+
+
+class FrameSchema():
+    # Describes a fixed part of a frame as (name, format) pairs, format is a single
+    # struct code with an optional byte order ("<" when omitted, single byte codes
+    # follow the previous field). Consecutive fields with the same byte order share
+    # one precompiled struct.Struct and the encode, decode and decode_into functions
+    # are generated once for the schema.
+
+    def __init__(self, *fields: Tuple[str, str]):
+        self.fields = fields
+        self.names = [name for name, _ in fields]
+
+        groups: List[Tuple[str, List[str], List[int]]] = []
+        for i, (name, fmt) in enumerate(fields):
+            code = fmt.lstrip(BYTE_ORDERS)
+
+            if fmt[0] in BYTE_ORDERS:
+                order = fmt[0]
+            elif code in SINGLE_BYTE_CODES and groups:
+                # byte order does not matter, the field joins the previous struct
+                order = groups[-1][0]
+            else:
+                order = "<"
+
+            if not name.isidentifier() or len(code) != 1:
+                raise ValueError("invalid field {} {}".format(name, fmt))
+
+            if groups and groups[-1][0] == order:
+                groups[-1][1].append(code)
+                groups[-1][2].append(i)
+                continue
+
+            groups.append((order, [code], [i]))
+
+        self.structs = [struct.Struct(order + "".join(codes)) for order, codes, _ in groups]
+        self.size = sum(s.size for s in self.structs)
+
+        # --------------------------------------
+        # generating fast path functions
+        values = ["v{}".format(i) for i in range(len(fields))]
+
+        decode_src = ["def decode(buffer, offset=0):"]
+        decode_into_src = ["def decode_into(obj, buffer, offset=0):"]
+        pack_lst = []
+
+        offset = 0
+        for n, (_, _, indexes) in enumerate(groups):
+            targets = ", ".join(values[i] for i in indexes) + ","
+            decode_src.append("    {} = _s{}.unpack_from(buffer, offset + {})".format(targets, n, offset))
+            decode_into_src.append("    {} = _s{}.unpack_from(buffer, offset + {})".format(targets, n, offset))
+            pack_lst.append("_s{}.pack({})".format(n, ", ".join(values[i] for i in indexes)))
+            offset += self.structs[n].size
+
+        decode_src.append("    return " + (", ".join(values) + "," if values else "()"))
+
+        decode_into_src += ["    obj.{} = {}".format(name, value) for name, value in zip(self.names, values)]
+        decode_into_src.append("    return obj")
+
+        encode_src = ["def encode({}):".format(", ".join(values)),
+                      "    return " + (" + ".join(pack_lst) if pack_lst else "b''")]
+
+        namespace = {"_s{}".format(n): s for n, s in enumerate(self.structs)}
+        source = "\n".join(decode_src + [""] + decode_into_src + [""] + encode_src) + "\n"
+        exec(compile(source, "<FrameSchema {}>".format(",".join(self.names)), "exec"), namespace)
+
+        self.decode = namespace["decode"]
+        self.decode_into = namespace["decode_into"]
+        self.encode = namespace["encode"]
+
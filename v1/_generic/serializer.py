@@ -0,0 +1,155 @@
+#!/usr/bin/python3.7
+import array, datetime, json, struct
+
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, IO, Tuple
+
+_fields_cache: Dict[type, Tuple[str, ...]] = {}
+_MISSING = object()
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+
+
+def _get_fields(cls: type) -> Tuple[str, ...]:
+    names = _fields_cache.get(cls)
+    if names is None:
+        names = tuple(f.name for f in fields(cls))
+        _fields_cache[cls] = names
+
+    return names
+
+
+def to_primitive(o: Any) -> Any:
+    # dataclass trees to dict/list without the deep copy of asdict, fields never
+    # assigned (init=False fields on error paths) are left out
+    if o is None or isinstance(o, (str, int, float, bool)):
+        return o
+
+    if isinstance(o, (datetime.date, datetime.datetime)):
+        return o
+
+    if is_dataclass(o):
+        result = {}
+        for name in _get_fields(type(o)):
+            value = getattr(o, name, _MISSING)
+            if value is not _MISSING:
+                result[name] = to_primitive(value)
+        return result
+
+    if hasattr(o, "_fields"):
+        return {name: to_primitive(getattr(o, name)) for name in o._fields}
+
+    if isinstance(o, dict):
+        return {k: to_primitive(v) for k, v in o.items()}
+
+    if isinstance(o, (bytes, bytearray)):
+        return list(o)
+
+    if isinstance(o, (memoryview, array.array)):
+        return o.tolist()
+
+    if isinstance(o, (list, tuple)):
+        return [to_primitive(v) for v in o]
+
+    return str(o)
+
+
+#######################################
+# json lines
+#######################################
+
+def dumps_json(o: Any) -> str:
+    return _json_encoder.encode(to_primitive(o))
+
+
+def write_json(o: Any, stream: IO[str]):
+    stream.write(dumps_json(o))
+    stream.write("\n")
+
+
+#######################################
+# msgpack
+#######################################
+
+def _pack(o: Any, out: bytearray):
+    if o is None:
+        out.append(0xC0)
+
+    elif o is True:
+        out.append(0xC3)
+
+    elif o is False:
+        out.append(0xC2)
+
+    elif isinstance(o, int):
+        if 0 <= o < 0x80:
+            out.append(o)
+        elif -32 <= o < 0:
+            out.append(o & 0xFF)
+        elif 0 <= o <= 0xFFFFFFFF:
+            out += struct.pack(">BL", 0xCE, o)
+        elif 0 <= o <= 0xFFFFFFFFFFFFFFFF:
+            out += struct.pack(">BQ", 0xCF, o)
+        else:
+            out += struct.pack(">Bq", 0xD3, o)
+
+    elif isinstance(o, float):
+        out += struct.pack(">Bd", 0xCB, o)
+
+    elif isinstance(o, str):
+        data = o.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            out.append(0xA0 | size)
+        elif size <= 0xFF:
+            out += struct.pack(">BB", 0xD9, size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xDA, size)
+        else:
+            out += struct.pack(">BL", 0xDB, size)
+        out += data
+
+    elif isinstance(o, datetime.datetime):
+        # timestamp extension (type -1), 96 bit format
+        timestamp = o.timestamp()
+        seconds = int(timestamp // 1)
+        out += struct.pack(">BBbLq", 0xC7, 12, -1, o.microsecond * 1000, seconds)
+
+    elif isinstance(o, datetime.date):
+        _pack(str(o), out)
+
+    elif isinstance(o, dict):
+        size = len(o)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xDE, size)
+        else:
+            out += struct.pack(">BL", 0xDF, size)
+        for k, v in o.items():
+            _pack(k, out)
+            _pack(v, out)
+
+    elif isinstance(o, list):
+        size = len(o)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size <= 0xFFFF:
+            out += struct.pack(">BH", 0xDC, size)
+        else:
+            out += struct.pack(">BL", 0xDD, size)
+        for v in o:
+            _pack(v, out)
+
+    else:
+        _pack(str(o), out)
+
+
+def dumps_msgpack(o: Any) -> bytes:
+    out = bytearray()
+    _pack(to_primitive(o), out)
+    return bytes(out)
+
+
+def write_msgpack(o: Any, stream: IO[bytes]):
+    stream.write(dumps_msgpack(o))
@@ -1,10 +1,12 @@
 #!/usr/bin/python3.7
-import struct, datetime
+import datetime
 
 from bsp.v1.aireador import errors
 from bsp.v1._generic.interfaces import MetadataBase, Command, DataReceivedBase, \
-    CommandBase, ParameterBase, AddressBase, VersionBase
+    CommandBase, ParameterBase, AddressBase, VersionBase, EXECUTION_ID_SCHEMA
+from bsp.v1._generic.schema import FrameSchema
 from bsp.v1._generic import utils
+from bsp.v1._generic.metrics import metrics
 
 from typing import List, Union, Type
 from dataclasses import dataclass, field
@@ -18,6 +20,14 @@ class Commands:
     set_capacitor: Command = Command("SET_CAPACITOR", 0x1E)
 
 
+DATA_RECEIVED_HEADER_SCHEMA = FrameSchema(
+    ("temperature", "B"),
+    ("humidity", "B"),
+    ("timestamp", "<L"),
+    ("cmd_code", "B")
+)
+
+
 @dataclass
 class DataReceived(DataReceivedBase):
 
@@ -26,39 +36,42 @@ class DataReceived(DataReceivedBase):
     temperature: float = field(init=False)
     humidity: float = field(init=False)
 
-    def __post_init__(self,
-                      stream: List[int],
-                      address: AddressBase,
-                      version_p: VersionBase,
-                      command_p: CommandBase,
-                      parameter_p: ParameterBase,
-                      metadata_dc: Union[Type[MetadataBase], MetadataBase]):
-
-        super().__post_init__(stream=stream,
-                              address=address,
-                              version_p=version_p,
-                              command_p=command_p,
-                              parameter_p=parameter_p,
-                              metadata_dc=metadata_dc)
+    def _parse(self,
+               stream: Union[List[int], bytes, bytearray, memoryview],
+               view: memoryview,
+               address: AddressBase,
+               version_p: VersionBase,
+               command_p: CommandBase,
+               parameter_p: ParameterBase,
+               metadata_dc: Union[Type[MetadataBase], MetadataBase]):
+
+        super()._parse(stream=stream,
+                       view=view,
+                       address=address,
+                       version_p=version_p,
+                       command_p=command_p,
+                       parameter_p=parameter_p,
+                       metadata_dc=metadata_dc)
 
         if self.status != utils.OK:
             return
 
         # ----------------------------------------
         # collect header and command
-        if len(stream) < 16:
+        if len(view) < 16:
             self.status = utils.ERROR_DATA_LENGTH_RECEIVED
             return
 
         temperature_raw, \
         humidity_raw, \
         timestamp, \
-        cmd_code = struct.unpack("<BBLB", bytearray(stream[4:11]))
+        cmd_code = DATA_RECEIVED_HEADER_SCHEMA.decode(view, 4)
 
         self.temperature = temperature_raw / 2
         self.humidity = humidity_raw / 2
         self.node_date = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).astimezone()
-        self.data = stream[11:-5]
+        data = view[11:-5]
+        self.data = data.tolist()
 
         # ----------------------------------------
         # check command
@@ -72,8 +85,8 @@ class DataReceived(DataReceivedBase):
                 self.status = self.command.name
                 return
 
-            device_execution_id = struct.unpack("<L", bytearray(self.data))[0]
-            if parameter_p.execution_id != device_execution_id:
+            device_execution_id = EXECUTION_ID_SCHEMA.decode(data)[0]
+            if not parameter_p.is_running(device_execution_id):
                 self.command = errors.errors_received[cmd_code]
                 self.status = self.command.name
                 return
@@ -83,7 +96,8 @@ class DataReceived(DataReceivedBase):
 
         # ----------------------------------------
         # collect header and command
-        self.metadata = metadata_dc(self.data)
+        with metrics.span("metadata"):
+            self.metadata = metadata_dc(data)
 
         if not self.metadata.valid:
             self.status = utils.ERROR_METADATA_RECEIVED_EMPTY
@@ -1,12 +1,22 @@
 #!/usr/bin/python3.7
-import struct
-
 from bsp.v1._generic.interfaces import MetadataBase
+from bsp.v1._generic import methods
+from bsp.v1._generic.schema import FrameSchema
 
 from typing import List
 from dataclasses import dataclass, field, InitVar
 
 
+READ_STATUS_SCHEMA = FrameSchema(
+    ("mode", "B"),
+    ("port_in", "<H"),
+    ("port_out", "<H"),
+    ("port_out_live", "<H")
+)
+
+READ_SCHEDULE_SCHEMA = FrameSchema(("port_out", "<H"))
+
+
 @dataclass
 class TableroStatus:
     port_in: InitVar[int]
@@ -52,7 +62,9 @@ class ReadStatus(MetadataBase):
     tablero: TableroStatus = field(init=False)
 
     def __post_init__(self, data: List[int]):
-        if len(data) != 7:
+        data = methods.as_view(data)
+
+        if len(data) != READ_STATUS_SCHEMA.size:
             self.valid = False
             return
 
@@ -63,15 +75,20 @@ class ReadStatus(MetadataBase):
             "oxygen"
         ]
 
-        if data[0] > 3:
+        mode, \
+        port_in, \
+        port_out, \
+        port_out_live = READ_STATUS_SCHEMA.decode(data)
+
+        if mode > 3:
             self.valid = False
             return
 
-        self.mode = app_mode[data[0]]
+        self.mode = app_mode[mode]
 
-        self.port_in, \
-        self.port_out, \
-        self.port_out_live = struct.unpack("<HHH", bytearray(data[1:]))
+        self.port_in = port_in
+        self.port_out = port_out
+        self.port_out_live = port_out_live
 
         self.tablero = TableroStatus(port_in=self.port_in, port_out_live=self.port_out_live)
 
@@ -84,11 +101,13 @@ class ReadSchedule(MetadataBase):
     schedule: List[int] = field(default_factory=list)
 
     def __post_init__(self, data):
-        if len(data) < 2:
+        data = methods.as_view(data)
+
+        if len(data) < READ_SCHEDULE_SCHEMA.size:
             self.valid = False
             return
 
-        self.port_out = struct.unpack("<H", bytearray(data[:2]))[0]
+        self.port_out = READ_SCHEDULE_SCHEMA.decode(data)[0]
 
         if len(data) < 3:
             self.valid = True
@@ -98,6 +117,6 @@ class ReadSchedule(MetadataBase):
             self.valid = False
             return
 
-        self.schedule = data[2:]
+        self.schedule = data[2:].tolist()
 
         self.valid = True
\ No newline at end of file
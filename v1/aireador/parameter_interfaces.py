@@ -1,13 +1,28 @@
 #!/usr/bin/python3.7
-import datetime, struct, time
+import datetime
 
 from bsp.v1.aireador import methods
-from bsp.v1._generic.interfaces import ParameterBase
+from bsp.v1._generic.interfaces import ParameterBase, new_execution_id
+from bsp.v1._generic.schema import FrameSchema
 
 from typing import List
 from dataclasses import dataclass, field
 
 
+TIMER_MODE_SCHEMA = FrameSchema(
+    ("date", "<L"),
+    ("port_out", "<H"),
+    ("duracion", "<H")
+)
+
+SCHEDULE_MODE_SCHEMA = FrameSchema(
+    ("date", "<L"),
+    ("port_out", "<H")
+)
+
+SET_CAPACITOR_SCHEMA = FrameSchema(("capacitor", "B"))
+
+
 @dataclass
 class TimerMode(ParameterBase):
     date: datetime.datetime = field(init=False)
@@ -16,8 +31,13 @@ class TimerMode(ParameterBase):
     duracion: int
 
     salidas: int = field(init=False)
+    dates: List[int] = field(repr=False, init=False)
 
     def __post_init__(self):
+        self.execution_id = new_execution_id()
+        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
+        self.dates = []
+
         if 1 > self.aireadores > 8:
             self.valid = False
             return
@@ -26,20 +46,25 @@ class TimerMode(ParameterBase):
             self.valid = False
             return
 
-        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
         self.salidas = int(self.aireadores / 2) + (self.aireadores % 2 > 0)
 
         self.valid = True
 
-    def get_raw(self) -> List[int]:
-        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
+    def _encode(self, date: int) -> bytes:
+        return TIMER_MODE_SCHEMA.encode(
+            date,
+            methods.capacitor_to_port_out(self.salidas, self.capacitor),
+            self.duracion
+        )
+
+    def get_raw_bytes(self) -> bytes:
+        return self._encode(self.new_date())
 
-        date_lst = list(struct.pack("<L", int(time.mktime(self.date.astimezone().timetuple()))))
-        port_out_int = methods.capacitor_to_port_out(self.salidas, self.capacitor)
-        port_out_lst = list(struct.pack("<H", port_out_int))
-        duracion_lst = list(struct.pack("<H", self.duracion))
+    def get_key_bytes(self) -> bytes:
+        return self._encode(0)
 
-        return date_lst + port_out_lst + duracion_lst
+    def get_raw(self) -> List[int]:
+        return list(self.get_raw_bytes())
 
 
 @dataclass
@@ -50,24 +75,34 @@ class ScheduleMode(ParameterBase):
     horarios: List[int]
 
     salidas: int = field(init=False)
+    dates: List[int] = field(repr=False, init=False)
 
     def __post_init__(self):
+        self.execution_id = new_execution_id()
+        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
+        self.dates = []
+
         if 1 > self.aireadores > 8:
             self.valid = False
             return
 
-        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
         self.salidas = int(self.aireadores / 2) + (self.aireadores % 2 > 0)
         self.valid = True
 
-    def get_raw(self) -> List[int]:
-        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
+    def _encode(self, date: int) -> bytes:
+        return SCHEDULE_MODE_SCHEMA.encode(
+            date,
+            methods.capacitor_to_port_out(self.salidas, self.capacitor)
+        ) + bytes(self.horarios)
+
+    def get_raw_bytes(self) -> bytes:
+        return self._encode(self.new_date())
 
-        date_lst = list(struct.pack("<L", int(time.mktime(self.date.astimezone().timetuple()))))
-        port_out_int = methods.capacitor_to_port_out(self.salidas, self.capacitor)
-        port_out_lst = list(struct.pack("<H", port_out_int))
+    def get_key_bytes(self) -> bytes:
+        return self._encode(0)
 
-        return date_lst + port_out_lst + self.horarios
+    def get_raw(self) -> List[int]:
+        return list(self.get_raw_bytes())
 
 
 @dataclass
@@ -75,7 +110,13 @@ class SetCapacitor(ParameterBase):
     capacitor: bool
 
     def __post_init__(self):
+        # setting the capacitor twice leaves the same state, no execution id needed
+        self.execution_id = 0
         self.valid = True
 
+    def get_raw_bytes(self) -> bytes:
+        return SET_CAPACITOR_SCHEMA.encode(0 if self.capacitor else 1)
+
     def get_raw(self) -> List[int]:
-        return [0 if self.capacitor else 1]
+        return list(self.get_raw_bytes())
+
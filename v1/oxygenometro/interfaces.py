@@ -1,10 +1,10 @@
 #!/usr/bin/python3.7
-import struct
-
 from bsp.v1.oxygenometro import errors
 from bsp.v1._generic.interfaces import MetadataBase, Command, DataReceivedBase, \
-    CommandBase, ParameterBase, AddressBase, VersionBase
+    CommandBase, ParameterBase, AddressBase, VersionBase, EXECUTION_ID_SCHEMA
+from bsp.v1._generic.schema import FrameSchema
 from bsp.v1._generic import utils
+from bsp.v1._generic.metrics import metrics
 
 from typing import List, Union, Type
 from dataclasses import dataclass, field
@@ -17,6 +17,15 @@ class Commands:
     oxygen_mode: Command = Command("RUN_OXYGEN_MODE", 0x1C)
 
 
+DATA_RECEIVED_HEADER_SCHEMA = FrameSchema(
+    ("temperature", "B"),
+    ("humidity", "B"),
+    ("solar_panel", "B"),
+    ("battery", "B"),
+    ("cmd_code", "B")
+)
+
+
 @dataclass
 class DataReceived(DataReceivedBase):
     # dictionary variables
@@ -25,27 +34,29 @@ class DataReceived(DataReceivedBase):
     solar_panel: str = field(init=False)
     battery: float = field(init=False)
 
-    def __post_init__(self,
-                      stream: List[int],
-                      address: AddressBase,
-                      version_p: VersionBase,
-                      command_p: CommandBase,
-                      parameter_p: ParameterBase,
-                      metadata_dc: Union[Type[MetadataBase], MetadataBase]):
-
-        super().__post_init__(stream=stream,
-                              address=address,
-                              version_p=version_p,
-                              command_p=command_p,
-                              parameter_p=parameter_p,
-                              metadata_dc=metadata_dc)
+    def _parse(self,
+               stream: Union[List[int], bytes, bytearray, memoryview],
+               view: memoryview,
+               address: AddressBase,
+               version_p: VersionBase,
+               command_p: CommandBase,
+               parameter_p: ParameterBase,
+               metadata_dc: Union[Type[MetadataBase], MetadataBase]):
+
+        super()._parse(stream=stream,
+                       view=view,
+                       address=address,
+                       version_p=version_p,
+                       command_p=command_p,
+                       parameter_p=parameter_p,
+                       metadata_dc=metadata_dc)
 
         if self.status != utils.OK:
             return
 
         # ----------------------------------------
         # collect header and command
-        if len(stream) < 14:
+        if len(view) < 14:
             self.status = utils.ERROR_DATA_LENGTH_RECEIVED
             return
 
@@ -53,7 +64,7 @@ class DataReceived(DataReceivedBase):
         humidity_raw, \
         solar_panel_raw, \
         battery_raw, \
-        cmd_code = struct.unpack("BBBBB", bytearray(stream[4:9]))
+        cmd_code = DATA_RECEIVED_HEADER_SCHEMA.decode(view, 4)
 
         solar_panel_str = [
             "Charging",
@@ -66,7 +77,8 @@ class DataReceived(DataReceivedBase):
         self.humidity = humidity_raw / 2
         self.solar_panel = solar_panel_str[0x3 & solar_panel_raw]
         self.battery = battery_raw / 10
-        self.data = stream[9:-5]
+        data = view[9:-5]
+        self.data = data.tolist()
 
         # ----------------------------------------
         # check command
@@ -80,8 +92,8 @@ class DataReceived(DataReceivedBase):
                 self.status = self.command.name
                 return
 
-            device_execution_id = struct.unpack("<L", bytearray(self.data))[0]
-            if parameter_p.execution_id != device_execution_id:
+            device_execution_id = EXECUTION_ID_SCHEMA.decode(data)[0]
+            if not parameter_p.is_running(device_execution_id):
                 self.command = errors.errors_received[cmd_code]
                 self.status = self.command.name
                 return
@@ -91,7 +103,8 @@ class DataReceived(DataReceivedBase):
 
         # ----------------------------------------
         # collect header and command
-        self.metadata = metadata_dc(self.data)
+        with metrics.span("metadata"):
+            self.metadata = metadata_dc(data)
 
         if not self.metadata.valid:
             self.status = utils.ERROR_METADATA_RECEIVED_EMPTY
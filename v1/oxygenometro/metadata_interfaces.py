@@ -1,12 +1,40 @@
 #!/usr/bin/python3.7
-import datetime, struct
+import array, datetime, struct
 
-from bsp.v1._generic.interfaces import MetadataBase
+from bsp.v1._generic.interfaces import MetadataBase, CRC_SCHEMA
+from bsp.v1._generic import methods
+from bsp.v1._generic.schema import FrameSchema
 
-from typing import List
+from typing import List, Union
 from dataclasses import dataclass, field, InitVar
 
 
+READ_STATUS_SCHEMA = FrameSchema(
+    ("state", "B"),
+    ("timestamp", "<L")
+)
+
+SALINITY_SCHEMA = FrameSchema(("salinity", ">f"))
+
+SAMPLE_SCHEMA = FrameSchema(
+    ("timestamp", "<L"),
+    ("dissolve_oxygen_concentration", ">f"),
+    ("doc_dqid", "B"),
+    ("temperature", ">f"),
+    ("temp_dqid", "B"),
+    ("dissolve_oxygen_saturation", ">f"),
+    ("dos_dqid", "B"),
+    ("oxygen_partial_pressure", ">f"),
+    ("opp_dqid", "B"),
+    ("internal_temperature", "B"),
+    ("internal_humidity", "B")
+)
+
+# samples of a full read_samples reply: one 240 byte E22 packet less [FW, HW, addh, addl],
+# the 5 byte header, crc, status and salinity
+MAX_SAMPLES = (240 - 9 - CRC_SCHEMA.size - READ_STATUS_SCHEMA.size - SALINITY_SCHEMA.size) // SAMPLE_SCHEMA.size
+
+
 @dataclass
 class ReadStatus(MetadataBase):
     mode: str = field(init=False)
@@ -17,7 +45,9 @@ class ReadStatus(MetadataBase):
     device_date: datetime.datetime = field(init=False)
 
     def __post_init__(self, data: List[int]):
-        if len(data) != 5:
+        data = methods.as_view(data)
+
+        if len(data) != READ_STATUS_SCHEMA.size:
             self.valid = False
             return
 
@@ -42,13 +72,15 @@ class ReadStatus(MetadataBase):
             "used"
         ]
 
-        self.mode = app_mode[3 & data[0]]
-        self.app_status = app_state[1 & (data[0]>>2)]
-        self.modbus_status = modbus_state[1 & (data[0]>>3)]
-        self.storage_status = storage_state[1 & (data[0] >> 4)]
+        state, \
+        timestamp = READ_STATUS_SCHEMA.decode(data)
+
+        self.mode = app_mode[3 & state]
+        self.app_status = app_state[1 & (state>>2)]
+        self.modbus_status = modbus_state[1 & (state>>3)]
+        self.storage_status = storage_state[1 & (state >> 4)]
 
         try:
-            timestamp = struct.unpack("<L", bytearray(data[1:5]))[0]
             self.device_date = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).astimezone()
         except Exception as e:
             self.valid = False
@@ -81,27 +113,38 @@ class Sample:
     valid: bool = field(repr=False, init=False)
 
     def __post_init__(self, stream_lst: List[int]):
-        if len(stream_lst) != 26:
+        stream_lst = methods.as_view(stream_lst)
+
+        if len(stream_lst) != SAMPLE_SCHEMA.size:
             self.valid = False
             return
 
+        timestamp, \
+        dissolve_oxygen_concentration, \
+        doc_dqid, \
+        temperature, \
+        temp_dqid, \
+        dissolve_oxygen_saturation, \
+        dos_dqid, \
+        oxygen_partial_pressure, \
+        opp_dqid, \
+        internal_temperature_raw, \
+        internal_humidity_raw = SAMPLE_SCHEMA.decode(stream_lst)
+
         try:
-            timestamp = struct.unpack("<L", bytearray(stream_lst[:4]))[0]
             self.date = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).astimezone()
         except Exception as e:
             self.valid = False
             return
 
-        self.dissolve_oxygen_concentration, \
-        self.doc_dqid, \
-        self.temperature, \
-        self.temp_dqid, \
-        self.dissolve_oxygen_saturation, \
-        self.dos_dqid, \
-        self.oxygen_partial_pressure, \
-        self.opp_dqid, \
-        internal_temperature_raw, \
-        internal_humidity_raw = struct.unpack(">fBfBfBfBBB", bytearray(stream_lst[4:]))
+        self.dissolve_oxygen_concentration = dissolve_oxygen_concentration
+        self.doc_dqid = doc_dqid
+        self.temperature = temperature
+        self.temp_dqid = temp_dqid
+        self.dissolve_oxygen_saturation = dissolve_oxygen_saturation
+        self.dos_dqid = dos_dqid
+        self.oxygen_partial_pressure = oxygen_partial_pressure
+        self.opp_dqid = opp_dqid
 
         self.internal_temperature = internal_temperature_raw / 2
         self.internal_humidity = internal_humidity_raw / 2
@@ -115,6 +158,8 @@ class ReadSamples(ReadStatus):
     samples: List[Sample] = field(init=False, default_factory=list)
 
     def __post_init__(self, data: List[int]):
+        data = methods.as_view(data)
+
         if len(data) < 5:
             self.valid = False
             return
@@ -125,16 +170,17 @@ class ReadSamples(ReadStatus):
             self.valid = True
             return
 
-        self.salinity = struct.unpack(">f", bytearray(data[5:9]))[0]
+        self.salinity = SALINITY_SCHEMA.decode(data, 5)[0]
 
         sub_data = data[9:]
+        size = SAMPLE_SCHEMA.size
 
-        if len(sub_data) % 26 != 0:
+        if len(sub_data) % size != 0:
             self.valid = False
             return
 
-        for i in range(int(len(sub_data) / 26)):
-            sample = Sample(sub_data[i * 26 : (i + 1) * 26])
+        for i in range(int(len(sub_data) / size)):
+            sample = Sample(sub_data[i * size : (i + 1) * size])
 
             if not sample.valid:
                 continue
@@ -142,3 +188,96 @@ class ReadSamples(ReadStatus):
             self.samples.append(sample)
 
         self.valid = True
+
+
+# timestamp is little endian on the wire, it is read big endian with the rest of the
+# sample and byteswapped afterwards for the whole column
+SAMPLE_STRUCT = struct.Struct(">LfBfBfBfBBB")
+_UINT32_TYPECODE = "I" if array.array("I").itemsize == 4 else "L"
+
+
+@dataclass
+class SampleColumns:
+    timestamp: array.array = field(default_factory=lambda: array.array("q"))
+
+    dissolve_oxygen_concentration: array.array = field(default_factory=lambda: array.array("f"))
+    doc_dqid: array.array = field(default_factory=lambda: array.array("B"))
+
+    temperature: array.array = field(default_factory=lambda: array.array("f"))
+    temp_dqid: array.array = field(default_factory=lambda: array.array("B"))
+
+    dissolve_oxygen_saturation: array.array = field(default_factory=lambda: array.array("f"))
+    dos_dqid: array.array = field(default_factory=lambda: array.array("B"))
+
+    oxygen_partial_pressure: array.array = field(default_factory=lambda: array.array("f"))
+    opp_dqid: array.array = field(default_factory=lambda: array.array("B"))
+
+    internal_temperature: array.array = field(default_factory=lambda: array.array("f"))
+    internal_humidity: array.array = field(default_factory=lambda: array.array("f"))
+
+    valid: bool = field(repr=False, default=True)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @staticmethod
+    def from_stream(stream: Union[bytes, bytearray, memoryview, List[int]]) -> 'SampleColumns':
+        stream = methods.as_view(stream)
+
+        columns = SampleColumns()
+
+        if len(stream) % SAMPLE_STRUCT.size != 0:
+            columns.valid = False
+            return columns
+
+        if len(stream) == 0:
+            return columns
+
+        timestamp, \
+        columns.dissolve_oxygen_concentration, \
+        columns.doc_dqid, \
+        columns.temperature, \
+        columns.temp_dqid, \
+        columns.dissolve_oxygen_saturation, \
+        columns.dos_dqid, \
+        columns.oxygen_partial_pressure, \
+        columns.opp_dqid, \
+        internal_temperature_raw, \
+        internal_humidity_raw = [array.array(t, c) for t, c in zip(
+            (_UINT32_TYPECODE, "f", "B", "f", "B", "f", "B", "f", "B", "B", "B"),
+            zip(*SAMPLE_STRUCT.iter_unpack(stream))
+        )]
+
+        timestamp.byteswap()
+        columns.timestamp = array.array("q", timestamp)
+        columns.internal_temperature = array.array("f", [x / 2 for x in internal_temperature_raw])
+        columns.internal_humidity = array.array("f", [x / 2 for x in internal_humidity_raw])
+
+        return columns
+
+    def get_date(self, i: int) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.timestamp[i], tz=datetime.timezone.utc).astimezone()
+
+
+@dataclass
+class ReadSamplesColumns(ReadStatus):
+    salinity: float = field(init=False)
+    samples: SampleColumns = field(init=False, default_factory=SampleColumns)
+
+    def __post_init__(self, data: List[int]):
+        data = methods.as_view(data)
+
+        if len(data) < 5:
+            self.valid = False
+            return
+
+        super().__post_init__(data=data[:5])
+
+        if len(data) < 9:
+            self.valid = True
+            return
+
+        self.salinity = SALINITY_SCHEMA.decode(data, 5)[0]
+
+        self.samples = SampleColumns.from_stream(data[9:])
+        self.valid = self.samples.valid
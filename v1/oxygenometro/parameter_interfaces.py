@@ -1,20 +1,45 @@
 #!/usr/bin/python3.7
-import datetime, struct, time, crcmod
+import datetime, time, crcmod
 
-from bsp.v1._generic.interfaces import ParameterBase
+from bsp.v1._generic.interfaces import ParameterBase, new_execution_id
+from bsp.v1._generic.schema import FrameSchema
 
 from typing import List
 from dataclasses import dataclass, field
 
 
+SAMPLES_FROM_SCHEMA = FrameSchema(("date", "<L"))
+
+STANDALONE_MODE_SCHEMA = FrameSchema(
+    ("date", "<L"),
+    ("sampling_time", "B"),
+    ("samples_to_reset", "B"),
+    ("salinidad", ">f"),
+    ("crc", "<H")
+)
+
+OXYGEN_MODE_SCHEMA = FrameSchema(
+    ("threshold_high", "<f"),
+    ("threshold_low", "<f"),
+    ("slaves", "B")
+)
+
+SALINITY_SCHEMA = FrameSchema(("salinidad", ">f"))
+
+# modbus write of the salinity register, the sensor checks it with its own crc16
+MODBUS_SALINITY_HEADER = bytes([0x01, 0x10, 0x00, 0x75, 0x00, 0x02, 0x04])
+_modbus_crc_func = crcmod.mkCrcFun(poly=0x18005, rev=True, initCrc=0xFFFF, xorOut=0x0000)
+
+
 @dataclass
 class SamplesFrom(ParameterBase):
     date: datetime.datetime
 
-    def get_raw(self) -> List[int]:
-        date_lst = list(struct.pack("<L", int(time.mktime(self.date.astimezone().timetuple()))))
+    def get_raw_bytes(self) -> bytes:
+        return SAMPLES_FROM_SCHEMA.encode(int(time.mktime(self.date.astimezone().timetuple())))
 
-        return date_lst
+    def get_raw(self) -> List[int]:
+        return list(self.get_raw_bytes())
 
 
 @dataclass
@@ -24,9 +49,12 @@ class StandaloneMode(ParameterBase):
     samples_to_reset: int
     salinidad: float
 
+    dates: List[int] = field(repr=False, init=False)
+
     def __post_init__(self):
+        self.execution_id = new_execution_id()
         self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
-        self.execution_id =  int(time.mktime(self.date.astimezone().timetuple()))
+        self.dates = []
 
         if 1 > self.sampling_time > 255:
             self.valid = False
@@ -42,18 +70,26 @@ class StandaloneMode(ParameterBase):
 
         self.valid = True
 
-    def get_raw(self) -> List[int]:
-        self.date = datetime.datetime.now(tz=datetime.timezone.utc).astimezone()
-        self.execution_id = int(time.mktime(self.date.astimezone().timetuple()))
+    def _encode(self, date: int) -> bytes:
+        crc = _modbus_crc_func(MODBUS_SALINITY_HEADER + SALINITY_SCHEMA.encode(self.salinidad))
 
-        date_lst = list(struct.pack("<L", int(time.mktime(self.date.astimezone().timetuple()))))
-        sal_lst = list(struct.pack(">f", self.salinidad))
+        return STANDALONE_MODE_SCHEMA.encode(
+            date,
+            self.sampling_time,
+            self.samples_to_reset,
+            self.salinidad,
+            crc
+        )
 
-        crc32_func = crcmod.mkCrcFun(poly=0x18005, rev=True, initCrc=0xFFFF, xorOut=0x0000)
-        crc = crc32_func(bytearray([0x01, 0x10, 0x00, 0x75, 0x00, 0x02, 0x04] + sal_lst))
-        crc_lst = list(struct.pack("<H", crc))
+    def get_raw_bytes(self) -> bytes:
+        # the node takes the date as its clock and as the id of the execution it starts
+        return self._encode(self.new_date())
 
-        return date_lst + [self.sampling_time, self.samples_to_reset] + sal_lst + crc_lst
+    def get_key_bytes(self) -> bytes:
+        return self._encode(0)
+
+    def get_raw(self) -> List[int]:
+        return list(self.get_raw_bytes())
 
 
 @dataclass
@@ -73,14 +109,13 @@ class OxygenMode(StandaloneMode):
             return
 
         try:
-            a = list(struct.pack("<f", self.threshold_high))
-            a = list(struct.pack("<f", self.threshold_low))
+            OXYGEN_MODE_SCHEMA.encode(self.threshold_high, self.threshold_low, self.slaves)
             self.valid = True
         except Exception as e:
             self.valid = False
 
-    def get_raw(self) -> List[int]:
-        th_h_lst = list(struct.pack("<f", self.threshold_high))
-        th_l_lst = list(struct.pack("<f", self.threshold_low))
+    def _encode(self, date: int) -> bytes:
+        return super()._encode(date) + OXYGEN_MODE_SCHEMA.encode(self.threshold_high, self.threshold_low, self.slaves)
 
-        return super().get_raw() + th_h_lst + th_l_lst + [self.slaves]
+    def get_raw(self) -> List[int]:
+        return list(self.get_raw_bytes())